@@ -1 +1,9 @@
-# Этот файл делает папку app Python пакетом
\ No newline at end of file
+# Этот файл делает папку app Python пакетом
+import os
+
+from dotenv import load_dotenv
+
+# Модули читают настройки из окружения при импорте, поэтому .env из корня проекта
+# подгружается первым. Уже заданные переменные (окружение хостинга,
+# uvicorn --env-file) не перезаписываются
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"))
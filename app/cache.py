@@ -0,0 +1,198 @@
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import models
+
+CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", "300"))
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "128"))
+AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "600"))
+IDEMPOTENCY_SIZE = int(os.getenv("IDEMPOTENCY_SIZE", "10000"))
+
+
+class TTLCache:
+    """Потокобезопасный LRU-кэш с ограничением времени жизни записей."""
+
+    def __init__(self, ttl: int, maxsize: int = 128):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, generation=None, ttl=None):
+        with self._lock:
+            # Значение прочитано до последней инвалидации и уже устарело
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def add(self, key, value) -> bool:
+        """Атомарно сохраняет значение, только если ключа еще нет. Возвращает True при успехе."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                return False
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return True
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+
+catalog_cache = TTLCache(ttl=CATALOG_CACHE_TTL, maxsize=CATALOG_CACHE_SIZE)
+
+# Модели, изменение которых сбрасывает кэш каталога
+CATALOG_MODELS = (models.DanceClass, models.Teacher, models.Schedule)
+
+# Токен -> снимок пользователя для dependencies.get_current_user
+auth_cache = TTLCache(ttl=AUTH_CACHE_TTL, maxsize=AUTH_CACHE_SIZE)
+
+# Ключ идемпотентности -> адрес, на который был перенаправлен первый запрос
+idempotency_cache = TTLCache(ttl=IDEMPOTENCY_TTL, maxsize=IDEMPOTENCY_SIZE)
+
+
+def _catalog_key(name, signature, db, args, kwargs):
+    bound = signature.bind(db, *args, **kwargs)
+    bound.apply_defaults()
+    return (name,) + tuple(v for k, v in bound.arguments.items() if k != "db")
+
+
+def _store_catalog(db, key, result, generation):
+    # Отвязываем объекты от сессии, чтобы commit в ней не сделал их expired
+    for obj in result:
+        if isinstance(obj, models.Base):
+            db.expunge(obj)
+    catalog_cache.set(key, result, generation)
+
+
+def cached_catalog(name: str):
+    """Декоратор read-through кэша для функций чтения каталога из crud."""
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(db: Session, *args, **kwargs):
+            key = _catalog_key(name, signature, db, args, kwargs)
+            result = catalog_cache.get(key)
+            if result is None:
+                generation = catalog_cache.generation
+                result = func(db, *args, **kwargs)
+                _store_catalog(db, key, result, generation)
+            return list(result)
+
+        return wrapper
+
+    return decorator
+
+
+def cached_catalog_async(name: str):
+    """То же, что cached_catalog, для корутин из crud_async. Кэш общий."""
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(db, *args, **kwargs):
+            key = _catalog_key(name, signature, db, args, kwargs)
+            result = catalog_cache.get(key)
+            if result is None:
+                generation = catalog_cache.generation
+                result = await func(db, *args, **kwargs)
+                _store_catalog(db, key, result, generation)
+            return list(result)
+
+        return wrapper
+
+    return decorator
+
+
+# Подписчики на изменения моделей: (кортеж моделей, функция инвалидации)
+_invalidators = []
+
+
+def invalidate_on_commit(model_classes, callback):
+    """Вызывает callback после commit, затронувшего любую из model_classes."""
+    _invalidators.append((tuple(model_classes), callback))
+
+
+invalidate_on_commit(CATALOG_MODELS, catalog_cache.invalidate)
+# Деактивация или снятие прав администратора должны действовать сразу
+invalidate_on_commit((models.User,), auth_cache.invalidate)
+
+
+def _mark_changed(session, model_class):
+    session.info.setdefault("changed_models", set()).add(model_class)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_changes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        _mark_changed(session, type(obj))
+
+
+@event.listens_for(Session, "after_bulk_update")
+@event.listens_for(Session, "after_bulk_delete")
+def _track_bulk_changes(update_context):
+    _mark_changed(update_context.session, update_context.mapper.class_)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_invalidators(session):
+    changed = session.info.pop("changed_models", None)
+    if not changed:
+        return
+    for model_classes, callback in _invalidators:
+        if any(issubclass(cls, model_classes) for cls in changed):
+            callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop("changed_models", None)
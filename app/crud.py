@@ -1,23 +1,26 @@
 from typing import Optional
-from sqlalchemy.orm import Session
-from passlib.context import CryptContext
-from . import models
+from sqlalchemy import and_, insert, or_, select, text
+from sqlalchemy.orm import Session, joinedload, selectinload
+from . import enrollment, models
 from . import schemas
+from .cache import cached_catalog
+from .passwords import get_pwd_context, hash_password
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
+from pydantic import ValidationError
 import os
 
-SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
+# Ключ по умолчанию годится только для локальной разработки: при старте без SECRET_KEY
+# приложение пишет предупреждение
+DEFAULT_SECRET_KEY = "your-secret-key-here"
+SECRET_KEY = os.getenv("SECRET_KEY", DEFAULT_SECRET_KEY)
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return hash_password(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -26,6 +29,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
+    from jose import jwt  # python-jose тянет cryptography: грузим при первом входе
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -53,13 +57,30 @@ def authenticate_user(db: Session, email: str, password: str):
     return user
 
 # Функции для новостей
+# Автор грузится сразу: списки — одним SELECT ... WHERE id IN (...) на всю страницу,
+# одна новость — через JOIN. Иначе каждый news.author в шаблоне или схеме — отдельный запрос
 def get_news(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.News).filter(models.News.is_published == True)\
+    return db.query(models.News).options(selectinload(models.News.author))\
+        .filter(models.News.is_published == True)\
         .order_by(models.News.created_at.desc())\
         .offset(skip).limit(limit).all()
 
+def get_news_after(db: Session, created_at: Optional[datetime] = None, news_id: Optional[int] = None,
+                   limit: int = 100):
+    # Keyset-пагинация: следующая страница начинается строго после (created_at, id) прошлой
+    query = db.query(models.News).options(selectinload(models.News.author))\
+        .filter(models.News.is_published == True)
+    if created_at is not None:
+        # created_at <= ... дает индексу диапазон, OR уточняет порядок внутри одной даты
+        query = query.filter(models.News.created_at <= created_at, or_(
+            models.News.created_at < created_at,
+            and_(models.News.created_at == created_at, models.News.id < news_id),
+        ))
+    return query.order_by(models.News.created_at.desc(), models.News.id.desc()).limit(limit).all()
+
 def get_news_item(db: Session, news_id: int):
-    return db.query(models.News).filter(models.News.id == news_id).first()
+    return db.query(models.News).options(joinedload(models.News.author))\
+        .filter(models.News.id == news_id).first()
 
 def create_news(db: Session, news: schemas.NewsCreate, author_id: int):
     db_news = models.News(**news.dict(), author_id=author_id)
@@ -68,24 +89,118 @@ def create_news(db: Session, news: schemas.NewsCreate, author_id: int):
     db.refresh(db_news)
     return db_news
 
+@cached_catalog("dance_classes")
 def get_dance_classes(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.DanceClass).filter(models.DanceClass.is_active == True).offset(skip).limit(limit).all()
 
+@cached_catalog("dance_classes_after")
+def get_dance_classes_after(db: Session, after_id: int = 0, limit: int = 100):
+    return db.query(models.DanceClass).filter(models.DanceClass.is_active == True, models.DanceClass.id > after_id)\
+        .order_by(models.DanceClass.id).limit(limit).all()
+
 def get_dance_class(db: Session, dance_class_id: int):
     return db.query(models.DanceClass).filter(models.DanceClass.id == dance_class_id).first()
 
+@cached_catalog("teachers")
 def get_teachers(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.Teacher).filter(models.Teacher.is_active == True).offset(skip).limit(limit).all()
 
+@cached_catalog("teachers_after")
+def get_teachers_after(db: Session, after_id: int = 0, limit: int = 100):
+    return db.query(models.Teacher).filter(models.Teacher.is_active == True, models.Teacher.id > after_id)\
+        .order_by(models.Teacher.id).limit(limit).all()
+
 def get_teacher(db: Session, teacher_id: int):
     return db.query(models.Teacher).filter(models.Teacher.id == teacher_id).first()
 
+@cached_catalog("schedule")
 def get_schedule(db: Session):
     return db.query(models.Schedule).all()
 
 def get_class_schedule(db: Session, dance_class_id: int):
     return db.query(models.Schedule).filter(models.Schedule.dance_class_id == dance_class_id).all()
 
+# Редактирование расписания с проверкой пересечений по залу и по преподавателю
+class ScheduleConflictError(Exception):
+    def __init__(self, conflicts):
+        super().__init__("Schedule slot overlaps existing slots")
+        self.conflicts = conflicts
+
+# Группы, внутри которых слоты одного дня не должны пересекаться
+SCHEDULE_GROUPS = (("room", models.Schedule.room), ("teacher", models.Schedule.teacher_id))
+
+def _preceding_slot(db: Session, slot: models.Schedule, column):
+    # Слоты группы не пересекаются, поэтому упорядочены и по началу, и по концу:
+    # с новым может пересечься только последний слот, начавшийся до его конца.
+    # Это один спуск по индексу (группа, день, начало), O(log n) при любом размере таблицы
+    query = db.query(models.Schedule).filter(
+        column == getattr(slot, column.key),
+        models.Schedule.day_of_week == slot.day_of_week,
+        models.Schedule.start_time < slot.end_time,
+    )
+    if slot.id is not None:
+        query = query.filter(models.Schedule.id != slot.id)
+    previous = query.order_by(models.Schedule.start_time.desc()).first()
+    return previous if previous is not None and previous.end_time > slot.start_time else None
+
+def find_schedule_conflicts(db: Session, slot: models.Schedule):
+    conflicts = []
+    for kind, column in SCHEDULE_GROUPS:
+        previous = _preceding_slot(db, slot, column)
+        if previous is not None:
+            conflicts.append(schemas.ScheduleConflict(kind=kind, slot=previous))
+    return conflicts
+
+def find_existing_schedule_conflicts(db: Session):
+    """Пересечения, уже записанные в БД (до проверки или в обход нее): один проход по индексу."""
+    conflicts = []
+    for kind, column in SCHEDULE_GROUPS:
+        group, latest = None, None
+        for slot in db.query(models.Schedule).order_by(
+                column, models.Schedule.day_of_week, models.Schedule.start_time).yield_per(1000):
+            if (getattr(slot, column.key), slot.day_of_week) != group:
+                group, latest = (getattr(slot, column.key), slot.day_of_week), None
+            if latest is not None and slot.start_time < latest.end_time:
+                conflicts.append(schemas.ScheduleOverlap(kind=kind, slot=slot, overlaps=latest))
+            if latest is None or slot.end_time > latest.end_time:
+                latest = slot
+    return conflicts
+
+def _save_schedule_slot(db: Session, slot: models.Schedule):
+    # Проверка и запись атомарны: в SQLite flush берет единственный писатель (BEGIN IMMEDIATE),
+    # в Postgres параллельные правки ждут блокировки таблицы, чтение ей не мешает
+    if db.bind.dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE schedule IN SHARE ROW EXCLUSIVE MODE"))
+    db.add(slot)
+    db.flush()
+    # После flush сессия работает с писателем и видит собственные изменения
+    conflicts = find_schedule_conflicts(db, slot)
+    if conflicts:
+        db.rollback()
+        raise ScheduleConflictError(conflicts)
+    db.commit()
+    db.refresh(slot)
+    return slot
+
+def create_schedule_slot(db: Session, slot: schemas.ScheduleCreate):
+    return _save_schedule_slot(db, models.Schedule(**slot.dict()))
+
+def update_schedule_slot(db: Session, slot_id: int, slot: schemas.ScheduleCreate):
+    db_slot = db.get(models.Schedule, slot_id)
+    if db_slot is None:
+        return None
+    for field, value in slot.dict().items():
+        setattr(db_slot, field, value)
+    return _save_schedule_slot(db, db_slot)
+
+def delete_schedule_slot(db: Session, slot_id: int):
+    db_slot = db.get(models.Schedule, slot_id)
+    if db_slot is None:
+        return False
+    db.delete(db_slot)
+    db.commit()
+    return True
+
 def create_student(db: Session, student: schemas.StudentCreate):
     db_student = models.Student(**student.dict())
     db.add(db_student)
@@ -96,12 +211,117 @@ def create_student(db: Session, student: schemas.StudentCreate):
 def get_student_by_email(db: Session, email: str):
     return db.query(models.Student).filter(models.Student.email == email).first()
 
-def create_registration(db: Session, registration: schemas.RegistrationCreate):
-    db_registration = models.Registration(**registration.dict())
-    db.add(db_registration)
-    db.commit()
-    db.refresh(db_registration)
-    return db_registration
-
 def get_registrations_by_student(db: Session, student_id: int):
-    return db.query(models.Registration).filter(models.Registration.student_id == student_id).all()
\ No newline at end of file
+    return db.query(models.Registration).filter(models.Registration.student_id == student_id).all()
+
+# Массовый импорт: проверка схемами, поиск дублей одним запросом на пачку,
+# вставка через executemany и один commit на пачку
+IMPORT_CHUNK_SIZE = 1000
+
+def _validate_rows(rows, schema, start: int, report: dict):
+    valid = []
+    for number, row in enumerate(rows, start=start):
+        try:
+            valid.append((number, schema(**row)))
+        except (ValidationError, TypeError) as e:
+            report["skipped"] += 1
+            errors = e.errors() if isinstance(e, ValidationError) else [{"msg": str(e)}]
+            report["errors"].append({"row": number, "errors": [
+                {"field": ".".join(str(part) for part in err.get("loc", ())), "message": err["msg"]}
+                for err in errors
+            ]})
+    return valid
+
+def _new_import_report(total: int):
+    return {"total": total, "inserted": 0, "skipped": 0, "errors": []}
+
+def _finish_import_report(report: dict):
+    report["errors"].sort(key=lambda error: error["row"])
+    return report
+
+def import_students(db: Session, rows: list, chunk_size: int = IMPORT_CHUNK_SIZE):
+    report = _new_import_report(len(rows))
+    seen = set()
+    for offset in range(0, len(rows), chunk_size):
+        valid = _validate_rows(rows[offset:offset + chunk_size], schemas.StudentCreate, offset + 1, report)
+        emails = {student.email for _, student in valid}
+        existing = set(db.execute(
+            select(models.Student.email).where(models.Student.email.in_(emails))
+        ).scalars()) if emails else set()
+
+        batch = []
+        for number, student in valid:
+            if student.email in existing or student.email in seen:
+                report["skipped"] += 1
+                report["errors"].append({"row": number, "errors": [
+                    {"field": "email", "message": "Email already registered"}
+                ]})
+                continue
+            seen.add(student.email)
+            batch.append(student.dict())
+
+        if batch:
+            db.execute(insert(models.Student.__table__), batch)
+            db.commit()
+            report["inserted"] += len(batch)
+    return _finish_import_report(report)
+
+def import_registrations(db: Session, rows: list, chunk_size: int = IMPORT_CHUNK_SIZE):
+    # waitlisted — сколько из вставленных заявок встали в лист ожидания
+    report = {**_new_import_report(len(rows)), "waitlisted": 0}
+    seen = set()
+    for offset in range(0, len(rows), chunk_size):
+        valid = _validate_rows(rows[offset:offset + chunk_size], schemas.RegistrationCreate, offset + 1, report)
+        student_ids = {registration.student_id for _, registration in valid}
+        class_ids = {registration.dance_class_id for _, registration in valid}
+        known_students = set(db.execute(
+            select(models.Student.id).where(models.Student.id.in_(student_ids))
+        ).scalars()) if student_ids else set()
+        # Свободные места под блокировкой направлений: заявки сверх capacity уходят
+        # в лист ожидания, а параллельная запись через форму ждет конца пачки
+        free_seats = {
+            row.id: None if row.capacity is None else max(row.capacity - row.seats_taken, 0)
+            for row in db.execute(enrollment.lock_classes(class_ids))
+        } if class_ids else {}
+        # Уникальный индекс (студент, направление): уже существующие пары — ошибки строк, а не 500.
+        # Выборка по обоим IN шире нужной, но это один запрос на пачку
+        existing = {tuple(row) for row in db.execute(
+            select(models.Registration.student_id, models.Registration.dance_class_id).where(
+                models.Registration.student_id.in_(student_ids),
+                models.Registration.dance_class_id.in_(class_ids),
+            )
+        )} if student_ids else set()
+
+        batch = []
+        for number, registration in valid:
+            errors = []
+            if registration.student_id not in known_students:
+                errors.append({"field": "student_id", "message": "Student not found"})
+            if registration.dance_class_id not in free_seats:
+                errors.append({"field": "dance_class_id", "message": "Dance class not found"})
+            pair = (registration.student_id, registration.dance_class_id)
+            if not errors and (pair in existing or pair in seen):
+                errors.append({"field": "dance_class_id", "message": "Already registered"})
+            if errors:
+                report["skipped"] += 1
+                report["errors"].append({"row": number, "errors": errors})
+                continue
+            seen.add(pair)
+            status = "pending"
+            free = free_seats[registration.dance_class_id]
+            if free is not None:
+                if free:
+                    free_seats[registration.dance_class_id] = free - 1
+                else:
+                    status = "waitlisted"
+                    report["waitlisted"] += 1
+            batch.append({**registration.dict(), "status": status})
+
+        if batch:
+            db.execute(insert(models.Registration.__table__), batch)
+            db.execute(enrollment.recount_seats({registration["dance_class_id"] for registration in batch}))
+            db.commit()
+            report["inserted"] += len(batch)
+        else:
+            db.rollback()
+    return _finish_import_report(report)
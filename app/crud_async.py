@@ -0,0 +1,341 @@
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from . import enrollment, models
+from . import schemas
+from .cache import cached_catalog_async
+from .passwords import password_hasher
+
+# Асинхронные версии функций crud для async-маршрутов.
+# Синхронный crud остается для скриптов (init_db.py, create_tables.py) и def-маршрутов.
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(models.User).filter(models.User.email == email))
+    return result.scalars().first()
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate):
+    hashed_password = await password_hasher.hash(user.password)
+    db_user = models.User(
+        email=user.email,
+        hashed_password=hashed_password,
+        full_name=user.full_name
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    user = await get_user_by_email(db, email)
+    if not user:
+        return False
+    valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+    if not valid:
+        return False
+    if new_hash:
+        # Стоимость bcrypt изменилась в настройках: перехешируем без сброса пароля
+        user.hashed_password = new_hash
+        await db.commit()
+    return user
+
+# Функции для новостей
+# В AsyncSession ленивая загрузка невозможна (MissingGreenlet): автор грузится явно
+async def get_news(db: AsyncSession, skip: int = 0, limit: int = 100):
+    result = await db.execute(
+        select(models.News).options(selectinload(models.News.author))
+        .filter(models.News.is_published == True)
+        .order_by(models.News.created_at.desc())
+        .offset(skip).limit(limit)
+    )
+    return result.scalars().all()
+
+async def get_news_item(db: AsyncSession, news_id: int):
+    return await db.get(models.News, news_id, options=[joinedload(models.News.author)])
+
+@cached_catalog_async("dance_classes")
+async def get_dance_classes(db: AsyncSession, skip: int = 0, limit: int = 100):
+    result = await db.execute(
+        select(models.DanceClass).filter(models.DanceClass.is_active == True).offset(skip).limit(limit)
+    )
+    return result.scalars().all()
+
+@cached_catalog_async("teachers")
+async def get_teachers(db: AsyncSession, skip: int = 0, limit: int = 100):
+    result = await db.execute(
+        select(models.Teacher).filter(models.Teacher.is_active == True).offset(skip).limit(limit)
+    )
+    return result.scalars().all()
+
+@cached_catalog_async("schedule")
+async def get_schedule(db: AsyncSession):
+    result = await db.execute(select(models.Schedule))
+    return result.scalars().all()
+
+@cached_catalog_async("schedule_by_day")
+async def get_schedule_by_day(db: AsyncSession):
+    # Одним запросом: слоты активных направлений с именами направления и преподавателя.
+    # Слоты неактивных направлений не показываются, неактивный преподаватель дает teacher_name=None
+    result = await db.execute(
+        select(
+            models.Schedule,
+            models.DanceClass.name.label("class_name"),
+            models.Teacher.name.label("teacher_name"),
+        )
+        .join(models.DanceClass, models.DanceClass.id == models.Schedule.dance_class_id)
+        .outerjoin(models.Teacher, (models.Teacher.id == models.Schedule.teacher_id)
+                   & (models.Teacher.is_active == True))
+        .filter(models.DanceClass.is_active == True)
+        .order_by(models.Schedule.start_time, models.Schedule.id)
+    )
+    days = {day: [] for day in models.WEEK_DAYS}
+    for slot, class_name, teacher_name in result:
+        days.setdefault(slot.day_of_week, []).append(schemas.ScheduleEntry(
+            id=slot.id,
+            dance_class_id=slot.dance_class_id,
+            class_name=class_name,
+            teacher_id=slot.teacher_id,
+            teacher_name=teacher_name,
+            day_of_week=slot.day_of_week,
+            start_time=slot.start_time,
+            end_time=slot.end_time,
+            room=slot.room,
+        ))
+    return [schemas.ScheduleDay(day=day, items=items) for day, items in days.items()]
+
+async def get_student_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(models.Student).filter(models.Student.email == email))
+    return result.scalars().first()
+
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+async def _insert_ignore(db: AsyncSession, model, values: dict, *conflict_columns):
+    """Вставка, которая молча пропускает конфликт уникального ключа.
+
+    Возвращает первичный ключ новой строки или None, если строка уже была:
+    гонки на уникальных ключах не превращаются в 500.
+    """
+    upsert_insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if upsert_insert is not None:
+        # INSERT ... ON CONFLICT DO NOTHING
+        result = await db.execute(
+            upsert_insert(model).values(**values).on_conflict_do_nothing(index_elements=conflict_columns)
+        )
+        return result.inserted_primary_key[0] if result.rowcount else None
+    # Прочие БД: обычный INSERT в SAVEPOINT, конфликт откатывает только его
+    try:
+        async with db.begin_nested():
+            result = await db.execute(insert(model).values(**values))
+    except IntegrityError:
+        return None
+    return result.inserted_primary_key[0]
+
+async def _enroll(db: AsyncSession, student_id: int, dance_class_id: int):
+    """Заявка с местом или в лист ожидания, без commit.
+
+    Возвращает (id заявки, статус); None, если направления нет или заявка уже есть.
+    """
+    taken = (await db.execute(enrollment.take_seat(dance_class_id))).rowcount
+    if not taken:
+        # Мест нет. Берем блокировку направления и пробуем еще раз: без нее отмена,
+        # завершившаяся между UPDATE и вставкой, не увидела бы эту заявку в очереди
+        if (await db.execute(enrollment.lock_class(dance_class_id))).first() is None:
+            await db.rollback()
+            return None
+        taken = (await db.execute(enrollment.take_seat(dance_class_id))).rowcount
+    status = "pending" if taken else "waitlisted"
+    registration_id = await _insert_ignore(db, models.Registration, {
+        "student_id": student_id,
+        "dance_class_id": dance_class_id,
+        "registration_date": func.now(),
+        "status": status,
+    }, "student_id", "dance_class_id")
+    if registration_id is None:
+        # Повторная заявка: место возвращается откатом, статус остается прежним
+        await db.rollback()
+        return None
+    return registration_id, status
+
+async def get_registration_status(db: AsyncSession, registration_id: int):
+    """(статус, позиция в листе ожидания или None)."""
+    registration = await db.get(models.Registration, registration_id)
+    if registration.status != "waitlisted":
+        return registration.status, None
+    position = (await db.execute(
+        enrollment.waitlist_count(registration.dance_class_id, registration.id)
+    )).scalar_one()
+    return registration.status, position
+
+async def _find_registration(db: AsyncSession, student_id: int, dance_class_id: int):
+    return (await db.execute(
+        select(models.Registration.id, models.Registration.status).filter(
+            models.Registration.student_id == student_id,
+            models.Registration.dance_class_id == dance_class_id,
+        )
+    )).first()
+
+async def register_student(db: AsyncSession, student: schemas.StudentCreate, dance_class_id: int):
+    """Находит или создает студента и записывает его на направление в одной транзакции.
+
+    Место захватывается атомарно; если мест нет, заявка встает в лист ожидания.
+    Повторная запись на то же направление ничего не меняет, кроме записи после отмены.
+    Возвращает (статус, позиция в листе ожидания или None); None, если направления нет.
+    """
+    await _insert_ignore(db, models.Student, {**student.dict(), "created_at": func.now()}, "email")
+    student_id = (await db.execute(
+        select(models.Student.id).filter(models.Student.email == student.email)
+    )).scalar_one()
+    enrolled = await _enroll(db, student_id, dance_class_id)
+    if enrolled is None:
+        existing = await _find_registration(db, student_id, dance_class_id)
+        if existing is None:
+            return None
+        if existing.status != "cancelled":
+            return await get_registration_status(db, existing.id)
+        # Запись после отмены: отмененная заявка заменяется новой — с местом или
+        # в конец листа ожидания (очередь упорядочена по id)
+        await db.execute(
+            delete(enrollment.registrations).where(
+                enrollment.registrations.c.id == existing.id,
+                enrollment.registrations.c.status == "cancelled",
+            )
+        )
+        enrolled = await _enroll(db, student_id, dance_class_id)
+        if enrolled is None:
+            # Направления больше нет или параллельный запрос уже записал студента заново
+            existing = await _find_registration(db, student_id, dance_class_id)
+            if existing is None or existing.status == "cancelled":
+                return None
+            return await get_registration_status(db, existing.id)
+    registration_id, status = enrolled
+    await db.commit()
+    if status == "waitlisted":
+        return await get_registration_status(db, registration_id)
+    return status, None
+
+async def create_student(db: AsyncSession, student: schemas.StudentCreate):
+    db_student = models.Student(**student.dict())
+    db.add(db_student)
+    await db.commit()
+    await db.refresh(db_student)
+    return db_student
+
+async def create_registration(db: AsyncSession, registration: schemas.RegistrationCreate):
+    enrolled = await _enroll(db, registration.student_id, registration.dance_class_id)
+    if enrolled is None:
+        return None
+    await db.commit()
+    return await db.get(models.Registration, enrolled[0])
+
+async def cancel_registration(db: AsyncSession, registration_id: int):
+    """Отменяет заявку; ее место сразу получает первая заявка из листа ожидания.
+
+    Возвращает (заявка, id повышенной заявки или None); None, если заявки нет.
+    """
+    registration = await db.get(models.Registration, registration_id, populate_existing=True)
+    if registration is None:
+        return None
+    if registration.status == "cancelled":
+        return registration, None
+    dance_class_id, old_status = registration.dance_class_id, registration.status
+
+    # Сначала направление, потом заявки — в том же порядке, что и при записи (без взаимоблокировок)
+    await db.execute(enrollment.lock_class(dance_class_id))
+    cancelled = await db.execute(
+        update(enrollment.registrations)
+        .where(enrollment.registrations.c.id == registration_id,
+               enrollment.registrations.c.status == old_status)
+        .values(status="cancelled")
+    )
+    if not cancelled.rowcount:
+        # Статус успел измениться (повышение из очереди или другая отмена): читаем заново
+        await db.rollback()
+        return await cancel_registration(db, registration_id)
+
+    promoted = None
+    if old_status in models.SEAT_STATUSES:
+        head = (await db.execute(enrollment.waitlist_head(dance_class_id))).scalar()
+        if head is not None and (await db.execute(enrollment.promote([head]))).rowcount:
+            promoted = head
+        else:
+            await db.execute(enrollment.change_seats(dance_class_id, -1))
+    await db.commit()
+    await db.refresh(registration)
+    return registration, promoted
+
+async def get_enrollment(db: AsyncSession, dance_class_id: int, limit: int = 50):
+    dance_class = await db.get(models.DanceClass, dance_class_id, populate_existing=True)
+    if dance_class is None:
+        return None
+    waitlist_size = (await db.execute(enrollment.waitlist_count(dance_class_id))).scalar_one()
+    waitlist = (await db.execute(
+        select(models.Registration)
+        .filter(models.Registration.dance_class_id == dance_class_id,
+                models.Registration.status == "waitlisted")
+        .order_by(models.Registration.id)
+        .limit(limit)
+    )).scalars().all()
+    return schemas.ClassEnrollment(
+        dance_class_id=dance_class.id,
+        capacity=dance_class.capacity,
+        seats_taken=dance_class.seats_taken,
+        waitlist_size=waitlist_size,
+        waitlist=waitlist,
+    )
+
+async def set_capacity(db: AsyncSession, dance_class_id: int, capacity):
+    """Меняет число мест; освободившиеся места получает лист ожидания по очереди.
+
+    Уменьшение ниже числа занятых мест уже выданные места не отбирает.
+    """
+    # ORM-обновление: capacity видна в каталоге, его кэш должен сброситься
+    result = await db.execute(
+        update(models.DanceClass).where(models.DanceClass.id == dance_class_id).values(capacity=capacity)
+    )
+    if not result.rowcount:
+        await db.rollback()
+        return None
+    seats_taken = (await db.execute(enrollment.lock_class(dance_class_id))).one().seats_taken
+    free = None if capacity is None else capacity - seats_taken
+    if free is None or free > 0:
+        promoted = (await db.execute(enrollment.waitlist_head(dance_class_id, free))).scalars().all()
+        if promoted:
+            count = (await db.execute(enrollment.promote(promoted))).rowcount
+            await db.execute(enrollment.change_seats(dance_class_id, count))
+    await db.commit()
+    return await get_enrollment(db, dance_class_id)
+
+# Функции для админ-панели
+def _count(model, *criteria):
+    return select(func.count()).select_from(model).filter(*criteria).scalar_subquery()
+
+async def get_admin_stats(db: AsyncSession):
+    # Все счетчики панели одним запросом, без загрузки строк
+    result = await db.execute(select(
+        _count(models.DanceClass, models.DanceClass.is_active == True).label("classes"),
+        _count(models.Teacher, models.Teacher.is_active == True).label("teachers"),
+        _count(models.Student).label("students"),
+        _count(models.Registration).label("registrations"),
+    ))
+    return result.mappings().one()
+
+async def get_latest_registrations(db: AsyncSession, limit: int = 5):
+    result = await db.execute(
+        select(models.Registration)
+        .order_by(models.Registration.registration_date.desc(), models.Registration.id.desc())
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+async def get_students(db: AsyncSession, skip: int = 0, limit: int = 100):
+    result = await db.execute(
+        select(models.Student).order_by(models.Student.id.desc()).offset(skip).limit(limit)
+    )
+    return result.scalars().all()
+
+async def get_registrations(db: AsyncSession, skip: int = 0, limit: int = 100):
+    result = await db.execute(
+        select(models.Registration).order_by(models.Registration.id.desc()).offset(skip).limit(limit)
+    )
+    return result.scalars().all()
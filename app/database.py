@@ -1,7 +1,13 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.selectable import TextualSelect
+
+from .pool_stats import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_engine, pool_status
 
 # Получаем URL базы данных из переменных окружения
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -11,23 +17,185 @@ if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
 if not DATABASE_URL:
-    # Используем SQLite в памяти для продакшена
-    DATABASE_URL = "sqlite:///:memory:"
+    # Файл, а не :memory: — иначе у каждого воркера своя пустая БД
+    DATABASE_URL = "sqlite:///./dance_school.db"
 
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False}
+# Профиль производительности SQLite, применяется к каждому новому соединению
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "performance")  # "performance" или "default"
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # отрицательное — в КиБ
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+
+# Пул соединений для Postgres. Действует на каждый процесс uvicorn отдельно:
+# воркеры * (DB_POOL_SIZE + DB_MAX_OVERFLOW) * 2 (sync и async) <= max_connections
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # секунды, -1 — не пересоздавать
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+
+def _async_url(url: str) -> str:
+    # Асинхронные драйверы: aiosqlite для SQLite и asyncpg для Postgres
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:"):
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    if url.startswith("postgresql+psycopg2:"):
+        return url.replace("postgresql+psycopg2:", "postgresql+asyncpg:", 1)
+    return url
+
+
+def _apply_sqlite_profile(engine, readonly: bool):
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        # Транзакции начинаем сами (см. begin ниже), а не драйвер перед первым DML
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+        if readonly:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    @event.listens_for(sync_engine, "begin")
+    def begin(connection):
+        # Писатель сразу берет блокировку записи: без этого повышение read -> write
+        # внутри транзакции падает с "database is locked", не дожидаясь busy_timeout
+        connection.exec_driver_sql("BEGIN" if readonly else "BEGIN IMMEDIATE")
+
+
+def create_sqlite_engines(url: str, profile: str = SQLITE_PROFILE, is_async: bool = False):
+    """Возвращает (писатель, читатель) для SQLite.
+
+    В профиле "performance" писатель — одно соединение (записи выстраиваются в очередь
+    в пуле, а не падают на блокировке файла), читатели — отдельный пул с query_only.
+    В профиле "default" оба значения — один движок с настройками SQLite по умолчанию.
+    """
+    make_engine = create_async_engine if is_async else create_engine
+    # Асинхронному движку нужен пул, который ждет соединение, не блокируя event loop
+    queue_pool = InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool
+    connect_args = {"check_same_thread": False}
+
+    if ":memory:" in url or "mode=memory" in url:
+        # БД в памяти живет, пока открыто соединение: только один общий движок
+        engine = make_engine(url, connect_args=connect_args, poolclass=StaticPool)
+        return engine, engine
+    if profile != "performance":
+        engine = make_engine(url, connect_args=connect_args)
+        return engine, engine
+
+    writer = make_engine(url, connect_args=connect_args, poolclass=queue_pool,
+                         pool_size=1, max_overflow=0, pool_timeout=30)
+    reader = make_engine(url, connect_args=connect_args, poolclass=queue_pool,
+                         pool_size=SQLITE_READ_POOL_SIZE, max_overflow=0, pool_timeout=30)
+    _apply_sqlite_profile(writer, readonly=False)
+    _apply_sqlite_profile(reader, readonly=True)
+    instrument_engine(writer)
+    instrument_engine(reader)
+    return writer, reader
+
+
+def create_pooled_engine(url: str, is_async: bool = False):
+    """Движок для серверной БД с пулом из настроек DB_POOL_*."""
+    make_engine = create_async_engine if is_async else create_engine
+    engine = make_engine(
+        url,
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_timeout=DB_POOL_TIMEOUT,
     )
+    instrument_engine(engine)
+    return engine
+
+
+class RoutingSession(Session):
+    """Сессия, которая отправляет SELECT в пул читателей, а все остальное — писателю.
+
+    После первого обращения к писателю сессия остается на нем до commit или rollback,
+    чтобы видеть собственные незафиксированные изменения. SELECT ... FOR UPDATE тоже идет
+    писателю: прочитанное под блокировкой используется для записи в той же транзакции.
+    """
+
+    def __init__(self, *args, read_bind=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.read_bind = read_bind
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (self.read_bind is not None and not self._flushing
+                and not self.info.get("uses_writer") and isinstance(clause, (Select, TextualSelect))
+                and getattr(clause, "_for_update_arg", None) is None):
+            return self.read_bind
+        self.info["uses_writer"] = True
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _release_writer(session, transaction):
+    # После commit изменения видны читателям, держать соединение писателя незачем.
+    # SAVEPOINT (begin_nested) не в счет: внешняя транзакция еще идет на писателе
+    if transaction.parent is None:
+        session.info.pop("uses_writer", None)
+
+
+ASYNC_DATABASE_URL = _async_url(DATABASE_URL)
+
+if DATABASE_URL.startswith("sqlite"):
+    engine, read_engine = create_sqlite_engines(DATABASE_URL)
+    async_engine, async_read_engine = create_sqlite_engines(ASYNC_DATABASE_URL, is_async=True)
 else:
-    engine = create_engine(DATABASE_URL)
+    engine = read_engine = create_pooled_engine(DATABASE_URL)
+    async_engine = async_read_engine = create_pooled_engine(ASYNC_DATABASE_URL, is_async=True)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    class_=RoutingSession,
+    read_bind=read_engine if read_engine is not engine else None
+)
+AsyncSessionLocal = sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    read_bind=async_read_engine.sync_engine if async_read_engine is not async_engine else None,
+    autoflush=False,
+    expire_on_commit=False
+)
 Base = declarative_base()
 
+
+def pool_stats():
+    """Состояние пулов текущего процесса; общий для чтения и записи движок — один раз."""
+    engines = {"sync": engine, "sync_read": read_engine,
+               "async": async_engine, "async_read": async_read_engine}
+    stats, seen = {}, set()
+    for name, pooled in engines.items():
+        if id(pooled) not in seen:
+            seen.add(id(pooled))
+            stats[name] = pool_status(pooled)
+    return stats
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
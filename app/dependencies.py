@@ -1,17 +1,39 @@
+import time
+from dataclasses import dataclass
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from sqlalchemy.orm import Session
-from . import crud, models, schemas
-from .database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import crud, crud_async
+from .cache import auth_cache
+from .database import get_async_db
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
+@dataclass(frozen=True)
+class CurrentUser:
+    """Снимок пользователя, который безопасно хранить в кэше между запросами."""
+    id: int
+    email: str
+    full_name: Optional[str]
+    is_active: bool
+    is_admin: bool
+    claims: dict
+
+
 async def get_current_user(
         token: str = Depends(oauth2_scheme),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
+    current_user = auth_cache.get(token)
+    if current_user is not None:
+        return current_user
+
+    # Отложенный импорт: при попадании в кэш python-jose не нужен вовсе
+    from jose import JWTError, jwt
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -25,19 +47,33 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = crud.get_user_by_email(db, email=email)
+    generation = auth_cache.generation
+    user = await crud_async.get_user_by_email(db, email=email)
     if user is None:
         raise credentials_exception
-    return user
 
+    current_user = CurrentUser(
+        id=user.id,
+        email=user.email,
+        full_name=user.full_name,
+        is_active=user.is_active,
+        is_admin=user.is_admin,
+        claims=payload,
+    )
+    # Запись не должна пережить сам токен
+    ttl = min(auth_cache.ttl, payload.get("exp", 0) - time.time())
+    if ttl > 0:
+        auth_cache.set(token, current_user, generation, ttl=ttl)
+    return current_user
 
-async def get_current_active_user(current_user: models.User = Depends(get_current_user)):
+
+async def get_current_active_user(current_user: CurrentUser = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 
-async def get_current_admin_user(current_user: models.User = Depends(get_current_active_user)):
+async def get_current_admin_user(current_user: CurrentUser = Depends(get_current_active_user)):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    return current_user
\ No newline at end of file
+    return current_user
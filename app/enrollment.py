@@ -0,0 +1,87 @@
+from sqlalchemy import and_, func, or_, select, update
+
+from . import models
+
+# Запросы для мест на направлениях и листа ожидания, общие для crud и crud_async.
+# Все работают с таблицами, а не с моделями: ORM-обновление DanceClass считается
+# изменением каталога и сбрасывало бы кэш страниц на каждую заявку, хотя
+# seats_taken на страницах не показывается
+
+classes = models.DanceClass.__table__
+registrations = models.Registration.__table__
+
+
+def take_seat(dance_class_id: int):
+    """Захват места одним условным UPDATE: rowcount 0 — мест нет.
+
+    Перепродажа невозможна ни в одной БД: в Postgres UPDATE блокирует строку
+    направления и перепроверяет условие после ожидания, в SQLite писатель один.
+    """
+    return (
+        update(classes)
+        .where(classes.c.id == dance_class_id)
+        .where(or_(classes.c.capacity.is_(None), classes.c.seats_taken < classes.c.capacity))
+        .values(seats_taken=classes.c.seats_taken + 1)
+    )
+
+
+def change_seats(dance_class_id: int, delta: int):
+    return (
+        update(classes)
+        .where(classes.c.id == dance_class_id)
+        .values(seats_taken=classes.c.seats_taken + delta)
+    )
+
+
+def lock_class(dance_class_id: int):
+    """SELECT ... FOR UPDATE строки направления: в Postgres сериализует очередь и отмены
+    одного направления. В SQLite FOR UPDATE не генерируется — там писатель и так один.
+    """
+    return select(classes.c.id, classes.c.capacity, classes.c.seats_taken).where(
+        classes.c.id == dance_class_id
+    ).with_for_update()
+
+
+def lock_classes(class_ids):
+    """lock_class для нескольких направлений сразу — для импорта заявок."""
+    return select(classes.c.id, classes.c.capacity, classes.c.seats_taken).where(
+        classes.c.id.in_(class_ids)
+    ).order_by(classes.c.id).with_for_update()
+
+
+def waitlist_head(dance_class_id: int, limit=1):
+    query = select(registrations.c.id).where(
+        registrations.c.dance_class_id == dance_class_id,
+        registrations.c.status == "waitlisted",
+    ).order_by(registrations.c.id)
+    return query if limit is None else query.limit(limit)
+
+
+def promote(registration_ids):
+    # status = 'waitlisted' в условии: уже отмененную параллельно заявку не поднимаем
+    return (
+        update(registrations)
+        .where(registrations.c.id.in_(registration_ids), registrations.c.status == "waitlisted")
+        .values(status="pending")
+    )
+
+
+def waitlist_count(dance_class_id: int, up_to_id=None):
+    """Длина очереди, а с up_to_id — позиция этой заявки в ней."""
+    query = select(func.count()).select_from(registrations).where(
+        registrations.c.dance_class_id == dance_class_id,
+        registrations.c.status == "waitlisted",
+    )
+    return query if up_to_id is None else query.where(registrations.c.id <= up_to_id)
+
+
+def recount_seats(class_ids=None):
+    """Пересчет seats_taken по заявкам — после массовой загрузки в обход take_seat."""
+    taken = select(func.count()).select_from(registrations).where(
+        and_(registrations.c.dance_class_id == classes.c.id,
+             registrations.c.status.in_(models.SEAT_STATUSES))
+    ).scalar_subquery()
+    statement = update(classes).values(seats_taken=taken)
+    if class_ids is not None:
+        statement = statement.where(classes.c.id.in_(class_ids))
+    return statement
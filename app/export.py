@@ -0,0 +1,129 @@
+import codecs
+import csv
+import io
+import json
+import os
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import DateTime, literal, select
+from sqlalchemy.dialects import sqlite
+
+from . import models
+from .database import AsyncSessionLocal
+
+# Выгрузка таблиц для администратора потоком: строки читаются серверным курсором
+# пачками по EXPORT_BATCH_SIZE и сразу уходят клиенту, поэтому память не растет
+# с размером таблицы. Фильтры по датам и статусу выполняет БД
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+MEDIA_TYPES = {
+    "csv": "text/csv",  # charset=utf-8 добавляет Starlette
+    "ndjson": "application/x-ndjson",
+}
+
+students = models.Student.__table__
+registrations = models.Registration.__table__
+classes = models.DanceClass.__table__
+news = models.News.__table__
+
+# Границы периода в том же формате, в каком SQLite хранит func.now() — без микросекунд,
+# иначе строка "... 00:00:00" оказывается меньше границы "... 00:00:00.000000"
+_BOUND = DateTime().with_variant(sqlite.DATETIME(truncate_microseconds=True), "sqlite")
+
+
+def _date_range(query, column, date_from: date = None, date_to: date = None):
+    """Период по дням включительно: date_to — до начала следующего дня."""
+    if date_from is not None:
+        query = query.where(column >= literal(datetime.combine(date_from, time.min), _BOUND))
+    if date_to is not None:
+        query = query.where(column < literal(datetime.combine(date_to + timedelta(days=1), time.min), _BOUND))
+    return query
+
+
+def students_query(date_from: date = None, date_to: date = None):
+    # Столбцы совпадают с полями импорта: выгрузку можно загрузить обратно
+    query = select(
+        students.c.id, students.c.name, students.c.email, students.c.phone,
+        students.c.level, students.c.created_at,
+    ).order_by(students.c.id)
+    return _date_range(query, students.c.created_at, date_from, date_to)
+
+
+def registrations_query(date_from: date = None, date_to: date = None, statuses=(), dance_class_id: int = None):
+    query = select(
+        registrations.c.id, registrations.c.registration_date, registrations.c.status,
+        registrations.c.student_id, students.c.name.label("student_name"),
+        students.c.email.label("student_email"), registrations.c.dance_class_id,
+        classes.c.name.label("dance_class_name"),
+    ).select_from(
+        # Ссылки без внешних ключей: заявка выгружается, даже если студента или направления уже нет
+        registrations
+        .outerjoin(students, students.c.id == registrations.c.student_id)
+        .outerjoin(classes, classes.c.id == registrations.c.dance_class_id)
+    ).order_by(registrations.c.id)
+    if statuses:
+        query = query.where(registrations.c.status.in_(statuses))
+    if dance_class_id is not None:
+        query = query.where(registrations.c.dance_class_id == dance_class_id)
+    return _date_range(query, registrations.c.registration_date, date_from, date_to)
+
+
+def news_query(date_from: date = None, date_to: date = None, published: bool = None):
+    query = select(
+        news.c.id, news.c.title, news.c.content, news.c.author_id,
+        news.c.image_url, news.c.is_published, news.c.created_at,
+    ).order_by(news.c.id)
+    if published is not None:
+        query = query.where(news.c.is_published == published)
+    return _date_range(query, news.c.created_at, date_from, date_to)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+# Один кодировщик на все строки: json.dumps с параметрами создает новый на каждый вызов
+_json_encoder = json.JSONEncoder(ensure_ascii=False, default=_json_default)
+
+
+def _csv_encoder(columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def encode(rows):
+        writer.writerows(rows)
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk.encode("utf-8")
+
+    # BOM: Excel иначе открывает кириллицу не в той кодировке; импорт его пропускает (utf-8-sig)
+    return codecs.BOM_UTF8 + encode([columns]), encode
+
+
+def _ndjson_encoder(columns):
+    def encode(rows):
+        return "".join(
+            _json_encoder.encode(dict(zip(columns, row))) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+    return b"", encode
+
+
+async def stream(query, export_format: str, batch_size: int = EXPORT_BATCH_SIZE):
+    """Тело ответа: заголовок, затем по одному куску на пачку строк.
+
+    Сессия своя, а не из Depends: генератор StreamingResponse работает уже после
+    выхода из обработчика. SELECT идет в пул читателей и не держит писателя.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        columns = list(result.keys())
+        header, encode = (_csv_encoder if export_format == "csv" else _ndjson_encoder)(columns)
+        if header:
+            yield header
+        async for rows in result.partitions():
+            yield encode(rows)
@@ -1,38 +1,106 @@
-from fastapi import FastAPI, Request, Depends, HTTPException, Form, status
-from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, RedirectResponse
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Depends, HTTPException, Form, Query, status
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
 from fastapi.security import OAuth2PasswordRequestForm
+from pydantic import ValidationError
+from starlette.middleware.gzip import GZipMiddleware
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from datetime import timedelta
-from .database import SessionLocal, engine, get_db
-from . import models, crud, schemas
-from .dependencies import get_current_user, get_current_admin_user
+from typing import List, Literal, Optional, Union
+from datetime import date, datetime, timedelta
+from .database import SessionLocal, async_engine, async_read_engine, get_db, get_async_db, pool_stats
+from . import crud, crud_async, export, schemas, search
+from .cache import auth_cache, catalog_cache, idempotency_cache
+from .page_cache import PageCacheMiddleware, page_cache
+from . import templating
+from .static_assets import GZIP_LEVEL, GZIP_MIN_SIZE, STATIC_DIR, PrecompressedStaticFiles, static_url
+from .pagination import decode_cursor, encode_cursor
+from .passwords import PasswordHasherBusy, password_hasher
+from .profiling import PROFILING_ENABLED, ProfilingMiddleware, instrument
+from .query_guard import QUERY_GUARD, QueryGuardMiddleware, install as install_query_guard
+from . import metrics
+from .dependencies import CurrentUser, get_current_user, get_current_admin_user
+import asyncio
+import csv
+import io
+import json
+import logging
 import os
-from dotenv import load_dotenv
-import sys
+import uuid
+
+# Импорт модуля не трогает БД: схема создается командой python create_tables.py
+# до запуска воркеров. Переменные из .env подгружает пакет app (см. app/__init__.py)
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if crud.SECRET_KEY == crud.DEFAULT_SECRET_KEY:
+        logger.warning("SECRET_KEY is not set: access tokens are signed with the insecure default key")
+    # Первый посетитель после деплоя не ждет компиляции, а сломанный шаблон не дает стартовать
+    templating.warm_up(templates.env)
+    metrics_refresh = None
+    if metrics.METRICS_ENABLED and metrics.MULTIPROC_DIR:
+        metrics_refresh = asyncio.create_task(metrics.refresh_periodically())
+    try:
+        yield
+    finally:
+        if metrics_refresh is not None:
+            metrics_refresh.cancel()
+        metrics.mark_process_dead()
+        password_hasher.shutdown()
+        await async_engine.dispose()
+        await async_read_engine.dispose()
+
+
+app = FastAPI(title="Dance School", version="1.0.0", lifespan=lifespan)
+app.add_middleware(PageCacheMiddleware)
+# Снаружи кэша страниц: в кэше лежит несжатое тело, сжимается каждый ответ по Accept-Encoding.
+# Ответы с Content-Encoding (готовые .br/.gz статики) middleware пропускает
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=GZIP_LEVEL)
 
+# Setup templates and static files
+templates = templating.create_templates()
+templates.env.globals["static_url"] = static_url
+
+if QUERY_GUARD != "off":
+    install_query_guard()
+    app.add_middleware(QueryGuardMiddleware)
+if metrics.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware, router=app.router)
+# Профилирование подключается последним, чтобы быть внешним слоем (снаружи и метрик)
+# и учитывать попадания в кэш страниц
+if PROFILING_ENABLED:
+    instrument(templates)
+    app.add_middleware(ProfilingMiddleware)
+app.mount("/static", PrecompressedStaticFiles(directory=STATIC_DIR), name="static")
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Too many login attempts in progress, try again later"},
+        headers={"Retry-After": "1"},
+    )
 
-load_dotenv()
-SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./dance_school.db")
-
-# Create tables
-models.Base.metadata.create_all(bind=engine)
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
-app = FastAPI(title="Dance School", version="1.0.0")
 
-# Setup templates and static files
-templates = Jinja2Templates(directory="app/templates")
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+@app.exception_handler(crud.ScheduleConflictError)
+async def schedule_conflict_handler(request: Request, exc: crud.ScheduleConflictError):
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": str(exc), "conflicts": [conflict.model_dump(mode="json") for conflict in exc.conflicts]},
+    )
 
 
 # Frontend routes
 @app.get("/", response_class=HTMLResponse)
-async def read_root(request: Request, db: Session = Depends(get_db)):
-    classes = crud.get_dance_classes(db)
-    teachers = crud.get_teachers(db)
+async def read_root(request: Request, db: AsyncSession = Depends(get_async_db)):
+    classes = await crud_async.get_dance_classes(db)
+    teachers = await crud_async.get_teachers(db)
     return templates.TemplateResponse("index.html", {
         "request": request,
         "classes": classes,
@@ -41,8 +109,8 @@ async def read_root(request: Request, db: Session = Depends(get_db)):
 
 
 @app.get("/classes", response_class=HTMLResponse)
-async def read_classes(request: Request, db: Session = Depends(get_db)):
-    classes = crud.get_dance_classes(db)
+async def read_classes(request: Request, db: AsyncSession = Depends(get_async_db)):
+    classes = await crud_async.get_dance_classes(db)
     return templates.TemplateResponse("classes.html", {
         "request": request,
         "classes": classes
@@ -50,8 +118,8 @@ async def read_classes(request: Request, db: Session = Depends(get_db)):
 
 
 @app.get("/teachers", response_class=HTMLResponse)
-async def read_teachers(request: Request, db: Session = Depends(get_db)):
-    teachers = crud.get_teachers(db)
+async def read_teachers(request: Request, db: AsyncSession = Depends(get_async_db)):
+    teachers = await crud_async.get_teachers(db)
     return templates.TemplateResponse("teachers.html", {
         "request": request,
         "teachers": teachers
@@ -59,19 +127,11 @@ async def read_teachers(request: Request, db: Session = Depends(get_db)):
 
 
 @app.get("/schedule", response_class=HTMLResponse)
-async def read_schedule(request: Request, db: Session = Depends(get_db)):
-    schedule = crud.get_schedule(db)
-    classes = crud.get_dance_classes(db)
-    teachers = crud.get_teachers(db)
-
-    class_map = {cls.id: cls.name for cls in classes}
-    teacher_map = {teacher.id: teacher.name for teacher in teachers}
-
+async def read_schedule(request: Request, db: AsyncSession = Depends(get_async_db)):
+    schedule_days = await crud_async.get_schedule_by_day(db)
     return templates.TemplateResponse("schedule.html", {
         "request": request,
-        "schedule": schedule,
-        "class_map": class_map,
-        "teacher_map": teacher_map
+        "schedule_days": schedule_days
     })
 
 
@@ -81,11 +141,12 @@ async def read_contacts(request: Request):
 
 
 @app.get("/registration", response_class=HTMLResponse)
-async def registration_form(request: Request, db: Session = Depends(get_db)):
-    classes = crud.get_dance_classes(db)
+async def registration_form(request: Request, db: AsyncSession = Depends(get_async_db)):
+    classes = await crud_async.get_dance_classes(db)
     return templates.TemplateResponse("registration.html", {
         "request": request,
-        "classes": classes
+        "classes": classes,
+        "idempotency_key": uuid.uuid4().hex
     })
 
 
@@ -97,43 +158,93 @@ async def create_registration(
         phone: str = Form(...),
         level: str = Form(...),
         dance_class_id: int = Form(...),
-        db: Session = Depends(get_db)
+        idempotency_key: Optional[str] = Form(None),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    student = crud.get_student_by_email(db, email)
-    if not student:
+    # Ключ приходит из скрытого поля формы или заголовка Idempotency-Key.
+    # Повтор с тем же ключом получает тот же ответ без обращения к БД
+    key = request.headers.get("Idempotency-Key") or idempotency_key
+    success_url = "/registration/success"
+    # Проверка формы до записи ключа: иначе исправленная форма с тем же ключом
+    # получила бы редирект на успех, хотя заявка не сохранена
+    try:
         student_data = schemas.StudentCreate(
             name=name,
             email=email,
             phone=phone,
             level=level
         )
-        student = crud.create_student(db, student_data)
-
-    registration_data = schemas.RegistrationCreate(
-        student_id=student.id,
-        dance_class_id=dance_class_id
-    )
-    crud.create_registration(db, registration_data)
-
-    return RedirectResponse(url="/registration/success", status_code=303)
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors())
+    if key and not idempotency_cache.add(("registration", key), success_url):
+        return RedirectResponse(url=idempotency_cache.get(("registration", key)) or success_url, status_code=303)
+
+    try:
+        result = await crud_async.register_student(db, student_data, dance_class_id)
+        if result is None:
+            raise HTTPException(status_code=404, detail="Dance class not found")
+    except Exception:
+        if key:
+            idempotency_cache.discard(("registration", key))
+        raise
+
+    registration_status, position = result
+    if registration_status == "waitlisted":
+        # Мест нет: заявка в листе ожидания, повтор с тем же ключом увидит ту же позицию
+        success_url += f"?waitlist={position}"
+        if key:
+            idempotency_cache.set(("registration", key), success_url)
+    return RedirectResponse(url=success_url, status_code=303)
 
 
 @app.get("/registration/success", response_class=HTMLResponse)
-async def registration_success(request: Request):
-    return templates.TemplateResponse("registration_success.html", {"request": request})
+async def registration_success(request: Request, waitlist: Optional[int] = Query(None, ge=1)):
+    return templates.TemplateResponse("registration_success.html", {
+        "request": request,
+        "waitlist_position": waitlist
+    })
 
 
 # API endpoints
-@app.get("/api/classes", response_model=List[schemas.DanceClass])
-def read_classes_api(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    classes = crud.get_dance_classes(db, skip=skip, limit=limit)
-    return classes
+# Списки поддерживают два режима: skip/limit (как раньше, ответ — список)
+# и курсорный: ?cursor= для первой страницы, дальше next_cursor из ответа
+@app.get("/api/classes", response_model=Union[List[schemas.DanceClass], schemas.DanceClassPage])
+def read_classes_api(
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=500),
+        cursor: Optional[str] = None,
+        db: Session = Depends(get_db)
+):
+    if cursor is None:
+        classes = crud.get_dance_classes(db, skip=skip, limit=limit)
+        return classes
 
+    after_id = decode_cursor(cursor, id=int)["id"] if cursor else 0
+    classes = crud.get_dance_classes_after(db, after_id=after_id, limit=limit + 1)
+    next_cursor = encode_cursor(id=classes[limit - 1].id) if len(classes) > limit else None
+    return schemas.DanceClassPage(items=classes[:limit], next_cursor=next_cursor)
 
-@app.get("/api/teachers", response_model=List[schemas.Teacher])
-def read_teachers_api(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    teachers = crud.get_teachers(db, skip=skip, limit=limit)
-    return teachers
+
+@app.get("/api/teachers", response_model=Union[List[schemas.Teacher], schemas.TeacherPage])
+def read_teachers_api(
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=500),
+        cursor: Optional[str] = None,
+        db: Session = Depends(get_db)
+):
+    if cursor is None:
+        teachers = crud.get_teachers(db, skip=skip, limit=limit)
+        return teachers
+
+    after_id = decode_cursor(cursor, id=int)["id"] if cursor else 0
+    teachers = crud.get_teachers_after(db, after_id=after_id, limit=limit + 1)
+    next_cursor = encode_cursor(id=teachers[limit - 1].id) if len(teachers) > limit else None
+    return schemas.TeacherPage(items=teachers[:limit], next_cursor=next_cursor)
+
+
+@app.get("/api/schedule", response_model=List[schemas.ScheduleDay])
+async def read_schedule_api(db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.get_schedule_by_day(db)
 
 
 @app.post("/api/students/", response_model=schemas.Student)
@@ -147,9 +258,9 @@ def create_student_api(student: schemas.StudentCreate, db: Session = Depends(get
 @app.post("/token")
 async def login_for_access_token(
         form_data: OAuth2PasswordRequestForm = Depends(),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    user = crud.authenticate_user(db, form_data.username, form_data.password)
+    user = await crud_async.authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -164,42 +275,286 @@ async def login_for_access_token(
 
 
 @app.post("/register", response_model=schemas.User)
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_email(db, email=user.email)
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = await crud_async.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    return crud.create_user(db, user)
+    return await crud_async.create_user(db, user)
 
 
 # Admin routes
 @app.get("/admin")
 async def admin_panel(
         request: Request,
-        current_user: models.User = Depends(get_current_admin_user),
-        db: Session = Depends(get_db)
+        current_user: CurrentUser = Depends(get_current_admin_user),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    classes = crud.get_dance_classes(db)
-    teachers = crud.get_teachers(db)
-    students = db.query(models.Student).all()
-    registrations = db.query(models.Registration).all()
+    stats = await crud_async.get_admin_stats(db)
+    latest_registrations = await crud_async.get_latest_registrations(db, limit=5)
 
     return templates.TemplateResponse("admin.html", {
         "request": request,
         "user": current_user,
-        "classes": classes,
-        "teachers": teachers,
-        "students": students,
-        "registrations": registrations
+        "stats": stats,
+        "latest_registrations": latest_registrations
     })
 
 
+@app.get("/api/admin/students", response_model=List[schemas.Student])
+async def admin_students_api(
+        skip: int = Query(0, ge=0),
+        limit: int = Query(50, ge=1, le=500),
+        current_user: CurrentUser = Depends(get_current_admin_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    return await crud_async.get_students(db, skip=skip, limit=limit)
+
+
+@app.get("/api/admin/registrations", response_model=List[schemas.Registration])
+async def admin_registrations_api(
+        skip: int = Query(0, ge=0),
+        limit: int = Query(50, ge=1, le=500),
+        current_user: CurrentUser = Depends(get_current_admin_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    return await crud_async.get_registrations(db, skip=skip, limit=limit)
+
+
+@app.post("/api/admin/registrations/{registration_id}/cancel", response_model=schemas.RegistrationCancel)
+async def cancel_registration_api(
+        registration_id: int,
+        current_user: CurrentUser = Depends(get_current_admin_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    result = await crud_async.cancel_registration(db, registration_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Registration not found")
+    registration, promoted_id = result
+    return {"registration": registration, "promoted_registration_id": promoted_id}
+
+
+@app.get("/api/admin/classes/{dance_class_id}/enrollment", response_model=schemas.ClassEnrollment)
+async def class_enrollment_api(
+        dance_class_id: int,
+        limit: int = Query(50, ge=1, le=500),
+        current_user: CurrentUser = Depends(get_current_admin_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    enrollment = await crud_async.get_enrollment(db, dance_class_id, limit=limit)
+    if enrollment is None:
+        raise HTTPException(status_code=404, detail="Dance class not found")
+    return enrollment
+
+
+@app.put("/api/admin/classes/{dance_class_id}/capacity", response_model=schemas.ClassEnrollment)
+async def class_capacity_api(
+        dance_class_id: int,
+        body: schemas.ClassCapacity,
+        current_user: CurrentUser = Depends(get_current_admin_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    enrollment = await crud_async.set_capacity(db, dance_class_id, body.capacity)
+    if enrollment is None:
+        raise HTTPException(status_code=404, detail="Dance class not found")
+    return enrollment
+
+
+# Редактирование расписания: пересечения по залу и преподавателю отклоняются с 409
+@app.get("/api/admin/schedule", response_model=List[schemas.Schedule])
+def admin_schedule_api(
+        current_user: CurrentUser = Depends(get_current_admin_user),
+        db: Session = Depends(get_db)
+):
+    return crud.get_schedule(db)
+
+
+@app.get("/api/admin/schedule/conflicts", response_model=List[schemas.ScheduleOverlap])
+def admin_schedule_conflicts_api(
+        current_user: CurrentUser = Depends(get_current_admin_user),
+        db: Session = Depends(get_db)
+):
+    return crud.find_existing_schedule_conflicts(db)
+
+
+def _check_schedule_refs(db: Session, slot: schemas.ScheduleCreate):
+    if crud.get_dance_class(db, slot.dance_class_id) is None:
+        raise HTTPException(status_code=422, detail="Dance class not found")
+    if crud.get_teacher(db, slot.teacher_id) is None:
+        raise HTTPException(status_code=422, detail="Teacher not found")
+
+
+@app.post("/api/admin/schedule", response_model=schemas.Schedule)
+def create_schedule_api(
+        slot: schemas.ScheduleCreate,
+        current_user: CurrentUser = Depends(get_current_admin_user),
+        db: Session = Depends(get_db)
+):
+    _check_schedule_refs(db, slot)
+    return crud.create_schedule_slot(db, slot)
+
+
+@app.put("/api/admin/schedule/{slot_id}", response_model=schemas.Schedule)
+def update_schedule_api(
+        slot_id: int,
+        slot: schemas.ScheduleCreate,
+        current_user: CurrentUser = Depends(get_current_admin_user),
+        db: Session = Depends(get_db)
+):
+    _check_schedule_refs(db, slot)
+    db_slot = crud.update_schedule_slot(db, slot_id, slot)
+    if db_slot is None:
+        raise HTTPException(status_code=404, detail="Schedule slot not found")
+    return db_slot
+
+
+@app.delete("/api/admin/schedule/{slot_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_schedule_api(
+        slot_id: int,
+        current_user: CurrentUser = Depends(get_current_admin_user),
+        db: Session = Depends(get_db)
+):
+    if not crud.delete_schedule_slot(db, slot_id):
+        raise HTTPException(status_code=404, detail="Schedule slot not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+async def _read_import_rows(request: Request) -> list:
+    # Принимаем JSON-массив, CSV в теле запроса или CSV-файл в multipart-поле file
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Expected a CSV file in the 'file' field")
+        return _parse_csv(await upload.read())
+    body = await request.body()
+    if content_type.startswith("text/csv"):
+        return _parse_csv(body)
+    try:
+        rows = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of objects")
+    return rows
+
+
+def _parse_csv(data: bytes) -> list:
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+    # Пустые ячейки CSV означают отсутствующие необязательные поля
+    return [
+        {key: value if value != "" else None for key, value in row.items() if key}
+        for row in csv.DictReader(io.StringIO(text))
+    ]
+
+
+@app.post("/api/admin/import/students", response_model=schemas.ImportReport)
+async def import_students_api(
+        request: Request,
+        chunk_size: int = Query(crud.IMPORT_CHUNK_SIZE, ge=1, le=5000),
+        current_user: CurrentUser = Depends(get_current_admin_user),
+        db: Session = Depends(get_db)
+):
+    rows = await _read_import_rows(request)
+    return await run_in_threadpool(crud.import_students, db, rows, chunk_size)
+
+
+@app.post("/api/admin/import/registrations", response_model=schemas.ImportReport)
+async def import_registrations_api(
+        request: Request,
+        chunk_size: int = Query(crud.IMPORT_CHUNK_SIZE, ge=1, le=5000),
+        current_user: CurrentUser = Depends(get_current_admin_user),
+        db: Session = Depends(get_db)
+):
+    rows = await _read_import_rows(request)
+    return await run_in_threadpool(crud.import_registrations, db, rows, chunk_size)
+
+
+# Выгрузки: CSV (совместим с импортом) или NDJSON, потоком без загрузки таблицы в память.
+# Период date_from..date_to — по дням включительно
+ExportFormat = Literal["csv", "ndjson"]
+
+
+def _export_response(name: str, query, export_format: str):
+    filename = f"{name}-{date.today().isoformat()}.{export_format}"
+    return StreamingResponse(
+        export.stream(query, export_format),
+        media_type=export.MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.get("/api/admin/export/students")
+async def export_students_api(
+        export_format: ExportFormat = Query("csv", alias="format"),
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    return _export_response("students", export.students_query(date_from, date_to), export_format)
+
+
+@app.get("/api/admin/export/registrations")
+async def export_registrations_api(
+        export_format: ExportFormat = Query("csv", alias="format"),
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        statuses: List[str] = Query([], alias="status"),
+        dance_class_id: Optional[int] = None,
+        current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    query = export.registrations_query(date_from, date_to, statuses, dance_class_id)
+    return _export_response("registrations", query, export_format)
+
+
+@app.get("/api/admin/export/news")
+async def export_news_api(
+        export_format: ExportFormat = Query("csv", alias="format"),
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        published: Optional[bool] = None,
+        current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    return _export_response("news", export.news_query(date_from, date_to, published), export_format)
+
+
+@app.get("/api/admin/cache")
+def catalog_cache_stats(current_user: CurrentUser = Depends(get_current_admin_user)):
+    return {
+        "catalog": catalog_cache.stats(),
+        "pages": page_cache.stats(),
+        "auth": auth_cache.stats(),
+    }
+
+
+@app.get("/api/admin/password-hasher")
+def password_hasher_stats(current_user: CurrentUser = Depends(get_current_admin_user)):
+    return password_hasher.stats()
+
+
+@app.get("/api/admin/db-pool")
+def db_pool_stats(current_user: CurrentUser = Depends(get_current_admin_user)):
+    # Счетчики на процесс: при нескольких воркерах ответ от одного из них (см. pid)
+    return pool_stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    if not metrics.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(metrics.render_metrics(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+
 # News routes
 @app.get("/news")
 async def news_list(
         request: Request,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    news_items = crud.get_news(db)
+    news_items = await crud_async.get_news(db)
     return templates.TemplateResponse("news.html", {
         "request": request,
         "news_items": news_items
@@ -210,9 +565,9 @@ async def news_list(
 async def news_detail(
         request: Request,
         news_id: int,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    news_item = crud.get_news_item(db, news_id)
+    news_item = await crud_async.get_news_item(db, news_id)
     if not news_item:
         raise HTTPException(status_code=404, detail="News not found")
 
@@ -223,15 +578,53 @@ async def news_detail(
 
 
 # API endpoints для новостей
-@app.get("/api/news", response_model=List[schemas.News])
-def get_news_api(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_news(db, skip=skip, limit=limit)
+@app.get("/api/news", response_model=Union[List[schemas.News], schemas.NewsPage])
+def get_news_api(
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=500),
+        cursor: Optional[str] = None,
+        db: Session = Depends(get_db)
+):
+    if cursor is None:
+        return crud.get_news(db, skip=skip, limit=limit)
+
+    key = decode_cursor(cursor, created_at=datetime, id=int) if cursor else {"created_at": None, "id": None}
+    news_items = crud.get_news_after(db, created_at=key["created_at"], news_id=key["id"], limit=limit + 1)
+    next_cursor = None
+    if len(news_items) > limit:
+        last = news_items[limit - 1]
+        next_cursor = encode_cursor(created_at=last.created_at, id=last.id)
+    return schemas.NewsPage(items=news_items[:limit], next_cursor=next_cursor)
+
+
+# Полнотекстовый поиск
+@app.get("/search", response_class=HTMLResponse)
+async def search_page(
+        request: Request,
+        q: str = Query("", max_length=200),
+        db: AsyncSession = Depends(get_async_db)
+):
+    results = await search.search(db, q) if q.strip() else []
+    return templates.TemplateResponse("search.html", {
+        "request": request,
+        "q": q,
+        "results": results
+    })
+
+
+@app.get("/api/search", response_model=schemas.SearchResults)
+async def search_api(
+        q: str = Query(..., min_length=1, max_length=200),
+        limit: int = Query(search.SEARCH_LIMIT, ge=1, le=100),
+        db: AsyncSession = Depends(get_async_db)
+):
+    return {"query": q, "items": await search.search(db, q, limit)}
 
 
 @app.post("/api/news", response_model=schemas.News)
 def create_news_api(
         news: schemas.NewsCreate,
-        current_user: models.User = Depends(get_current_admin_user),
+        current_user: CurrentUser = Depends(get_current_admin_user),
         db: Session = Depends(get_db)
 ):
     return crud.create_news(db, news, current_user.id)
@@ -246,8 +639,8 @@ async def gallery_page(request: Request, db: Session = Depends(get_db)):
     return templates.TemplateResponse("gallery.html", {"request": request})
 
 @app.get("/prices", response_class=HTMLResponse)
-async def prices_page(request: Request, db: Session = Depends(get_db)):
-    classes = crud.get_dance_classes(db)
+async def prices_page(request: Request, db: AsyncSession = Depends(get_async_db)):
+    classes = await crud_async.get_dance_classes(db)
     return templates.TemplateResponse("prices.html", {
         "request": request,
         "classes": classes
@@ -0,0 +1,177 @@
+import asyncio
+import os
+import time
+
+# При нескольких воркерах uvicorn PROMETHEUS_MULTIPROC_DIR должен указывать на пустой
+# каталог до запуска процессов: prometheus_client читает переменную при импорте,
+# и каждый воркер пишет значения в свои mmap-файлы, а /metrics суммирует их
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+    multiprocess,
+)
+from starlette.routing import Match
+
+from .cache import auth_cache, catalog_cache, idempotency_cache
+from .database import pool_stats
+from .page_cache import page_cache
+from .passwords import password_hasher
+
+METRICS_ENABLED = os.getenv("METRICS", "1").lower() in ("1", "true", "yes")
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+# Как часто каждый воркер обновляет свои значения пулов, кэшей и bcrypt
+METRICS_REFRESH_SECONDS = float(os.getenv("METRICS_REFRESH_SECONDS", "5"))
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests", ["method", "route", "status"]
+)
+LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests being processed", multiprocess_mode="livesum"
+)
+
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Pooled DB connections by state", ["engine", "state"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections handed out by the pool", ["engine"])
+DB_POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Pool checkouts that timed out", ["engine"])
+DB_POOL_WAIT = Counter(
+    "db_pool_checkout_wait_seconds_total", "Time spent waiting for a pooled connection", ["engine"]
+)
+
+CACHE_HITS = Counter("cache_hits_total", "Cache hits", ["cache"])
+CACHE_MISSES = Counter("cache_misses_total", "Cache misses", ["cache"])
+CACHE_ENTRIES = Gauge("cache_entries", "Entries in cache", ["cache"], multiprocess_mode="livesum")
+CACHE_HIT_RATIO = Gauge(
+    "cache_hit_ratio", "Cache hit ratio of a worker since start", ["cache"], multiprocess_mode="liveall"
+)
+
+PASSWORD_HASH_ACTIVE = Gauge(
+    "password_hash_active", "bcrypt operations running", multiprocess_mode="livesum"
+)
+PASSWORD_HASH_QUEUE = Gauge(
+    "password_hash_queue_depth", "bcrypt operations waiting for a worker", multiprocess_mode="livesum"
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total", "bcrypt operations rejected because the queue was full"
+)
+
+CACHES = {
+    "catalog": catalog_cache,
+    "pages": page_cache,
+    "auth": auth_cache,
+    "idempotency": idempotency_cache,
+}
+
+# Последние выгруженные значения накопительных счетчиков этого процесса
+_exported_totals = {}
+
+
+def _export_total(counter, value, *labels):
+    key = (counter, labels)
+    delta = value - _exported_totals.get(key, 0)
+    if delta > 0:
+        (counter.labels(*labels) if labels else counter).inc(delta)
+        _exported_totals[key] = value
+
+
+def refresh_process_metrics():
+    """Переносит в метрики состояние пулов, кэшей и bcrypt текущего процесса.
+
+    Вызывается не на каждый запрос, а при сборе метрик и периодически в фоне.
+    """
+    for engine_name, status in pool_stats().items():
+        for state in ("checked_out", "checked_in", "overflow"):
+            if state in status:
+                DB_POOL_CONNECTIONS.labels(engine_name, state).set(status[state])
+        if "checkouts" in status:
+            _export_total(DB_POOL_CHECKOUTS, status["checkouts"], engine_name)
+            _export_total(DB_POOL_TIMEOUTS, status["timeouts"], engine_name)
+            _export_total(DB_POOL_WAIT, status["wait_total_ms"] / 1000, engine_name)
+
+    for cache_name, cache in CACHES.items():
+        stats = cache.stats()
+        _export_total(CACHE_HITS, stats["hits"], cache_name)
+        _export_total(CACHE_MISSES, stats["misses"], cache_name)
+        CACHE_ENTRIES.labels(cache_name).set(stats["size"])
+        CACHE_HIT_RATIO.labels(cache_name).set(stats["hit_ratio"])
+
+    hasher = password_hasher.stats()
+    PASSWORD_HASH_ACTIVE.set(hasher["active"])
+    PASSWORD_HASH_QUEUE.set(hasher["queue_depth"])
+    _export_total(PASSWORD_HASH_REJECTED, hasher["rejected"])
+
+
+def render_metrics() -> bytes:
+    refresh_process_metrics()
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+async def refresh_periodically():
+    # Без фонового обновления сбор через один воркер видел бы устаревшие значения остальных
+    while True:
+        await asyncio.sleep(METRICS_REFRESH_SECONDS)
+        refresh_process_metrics()
+
+
+def mark_process_dead():
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def _route_label(scope, router):
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if "endpoint" in scope:
+        # Смонтированное приложение (/static): Mount переписывает path, его префикс — в root_path
+        return scope["root_path"][len(scope.get("app_root_path", "")):] or "/"
+    # Ответы из кэша страниц и 404 не доходят до роутера: сопоставляем сами
+    for route in router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "<unmatched>"
+
+
+class MetricsMiddleware:
+    """ASGI middleware: счетчик, гистограмма задержек и запросы в обработке.
+
+    Метка route — шаблон маршрута (/news/{news_id}), а не сырой путь.
+    """
+
+    def __init__(self, app, router):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.dec()
+            route = _route_label(scope, self.router)
+            REQUESTS.labels(scope["method"], route, str(status_code)).inc()
+            LATENCY.labels(scope["method"], route).observe(elapsed)
+
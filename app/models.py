@@ -1,7 +1,22 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Time, Boolean, ForeignKey, Index, event
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from .database import Base
+from .search import create_search_index
+
+# Порядок дней недели для расписания (значения Schedule.day_of_week)
+WEEK_DAYS = ["Понедельник", "Вторник", "Среда", "Четверг", "Пятница", "Суббота", "Воскресенье"]
+
+# Статусы заявок, которые занимают место на направлении. Остальные: "waitlisted" —
+# в листе ожидания (очередь по id), "cancelled" — отменена
+SEAT_STATUSES = ("pending", "confirmed")
+
+# Время занятия с точностью до минуты. В SQLite — строка "ЧЧ:ММ": сравнение строк
+# совпадает со сравнением времени, и данные до миграции 0005 уже в этом формате
+ScheduleTime = Time().with_variant(
+    sqlite.TIME(storage_format="%(hour)02d:%(minute)02d", regexp=r"(\d+):(\d+)"), "sqlite"
+)
 
 
 class DanceClass(Base):
@@ -14,8 +29,13 @@ class DanceClass(Base):
     duration = Column(Integer)
     price = Column(Float)
     image_url = Column(String(200))
-    is_active = Column(Boolean, default=True)
+    is_active = Column(Boolean, default=True, index=True)
     created_at = Column(DateTime, default=func.now())
+    # Мест на направлении; NULL — без ограничения
+    capacity = Column(Integer)
+    # Заявки в статусах SEAT_STATUSES. Счетчик, а не COUNT(*): место захватывается
+    # одним условным UPDATE (crud_async.register_student)
+    seats_taken = Column(Integer, nullable=False, default=0, server_default="0")
 
 
 class Teacher(Base):
@@ -27,18 +47,24 @@ class Teacher(Base):
     specialization = Column(String(100))
     experience = Column(Integer)
     photo_url = Column(String(200))
-    is_active = Column(Boolean, default=True)
+    is_active = Column(Boolean, default=True, index=True)
 
 
 class Schedule(Base):
     __tablename__ = "schedule"
+    __table_args__ = (
+        # Интервальные индексы для проверки пересечений (crud.find_schedule_conflicts):
+        # слоты одного зала или преподавателя в один день упорядочены по началу
+        Index("ix_schedule_room_day_of_week_start_time", "room", "day_of_week", "start_time"),
+        Index("ix_schedule_teacher_id_day_of_week_start_time", "teacher_id", "day_of_week", "start_time"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    dance_class_id = Column(Integer, nullable=False)
-    teacher_id = Column(Integer, nullable=False)
+    dance_class_id = Column(Integer, nullable=False, index=True)
+    teacher_id = Column(Integer, nullable=False, index=True)
     day_of_week = Column(String(20))
-    start_time = Column(String(10))
-    end_time = Column(String(10))
+    start_time = Column(ScheduleTime)
+    end_time = Column(ScheduleTime)
     room = Column(String(50))
 
 
@@ -55,10 +81,16 @@ class Student(Base):
 
 class Registration(Base):
     __tablename__ = "registrations"
+    __table_args__ = (
+        # Одна заявка студента на направление: защищает от двойной отправки формы
+        Index("uq_registrations_student_id_dance_class_id", "student_id", "dance_class_id", unique=True),
+        # Голова и позиция в листе ожидания: WHERE dance_class_id = ? AND status = 'waitlisted' ORDER BY id
+        Index("ix_registrations_dance_class_id_status_id", "dance_class_id", "status", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    student_id = Column(Integer, nullable=False)
-    dance_class_id = Column(Integer, nullable=False)
+    student_id = Column(Integer, nullable=False, index=True)
+    dance_class_id = Column(Integer, nullable=False, index=True)
     registration_date = Column(DateTime, default=func.now())
     status = Column(String(20), default="pending")
 
@@ -77,6 +109,10 @@ class User(Base):
 
 class News(Base):
     __tablename__ = "news"
+    __table_args__ = (
+        # Лента опубликованных новостей: WHERE is_published ORDER BY created_at DESC
+        Index("ix_news_is_published_created_at", "is_published", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
@@ -84,7 +120,17 @@ class News(Base):
     author_id = Column(Integer, ForeignKey("users.id"))
     image_url = Column(String(200))
     is_published = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=func.now())
+    # В SQLite даты хранятся строками: без микросекунд параметры курсора сравниваются
+    # с тем же форматом, что дает func.now()
+    created_at = Column(
+        DateTime().with_variant(sqlite.DATETIME(truncate_microseconds=True), "sqlite"),
+        default=func.now()
+    )
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
-    author = relationship("User")
\ No newline at end of file
+    author = relationship("User")
+
+
+# Полнотекстовый индекс и его триггеры создаются вместе с таблицами при create_all
+# (benchmarks/sqlite_profile.py); в рабочей БД их создает миграция 0004
+event.listen(Base.metadata, "after_create", create_search_index)
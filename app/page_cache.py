@@ -0,0 +1,148 @@
+import hashlib
+import os
+import time
+
+from . import models
+from .cache import CATALOG_MODELS, TTLCache, invalidate_on_commit
+
+PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", "60"))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+
+# Анонимные страницы, которые можно отдавать из кэша
+CACHED_PAGES = {"/", "/classes", "/teachers", "/schedule", "/prices", "/news", "/about"}
+
+# Модели, от которых зависит содержимое кэшируемых страниц (User — имена авторов новостей)
+PAGE_MODELS = CATALOG_MODELS + (models.News, models.User)
+
+
+class PageCache(TTLCache):
+    """Кэш отрендеренных страниц с ограничением по суммарному размеру в байтах."""
+
+    def __init__(self, ttl: int, maxbytes: int):
+        super().__init__(ttl=ttl, maxsize=maxbytes)
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+
+    def set(self, key, value, generation=None, ttl=None):
+        body = value["body"]
+        if len(body) > self.maxbytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.nbytes -= len(old[0]["body"])
+            self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self.nbytes += len(body)
+            while self.nbytes > self.maxbytes:
+                _, (evicted, _) = self._data.popitem(last=False)
+                self.nbytes -= len(evicted["body"])
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                del self._data[key]
+                self.nbytes -= len(entry[0]["body"])
+        return super().get(key)
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        stats = super().stats()
+        stats["bytes"] = self.nbytes
+        return stats
+
+
+page_cache = PageCache(ttl=PAGE_CACHE_TTL, maxbytes=PAGE_CACHE_MAX_BYTES)
+invalidate_on_commit(PAGE_MODELS, page_cache.invalidate)
+
+
+def _etag_matches(if_none_match: bytes, etag: bytes) -> bool:
+    if if_none_match.strip() == b"*":
+        return True
+    # Слабое сравнение (RFC 9110): префикс W/ не учитывается
+    return etag.removeprefix(b"W/") in [tag.strip().removeprefix(b"W/") for tag in if_none_match.split(b",")]
+
+
+class PageCacheMiddleware:
+    """ASGI middleware: отдает анонимные страницы из кэша с ETag и 304.
+
+    При попадании в кэш не открывается сессия БД и не вызывается Jinja2.
+    """
+
+    def __init__(self, app, paths=CACHED_PAGES):
+        self.app = app
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if b"authorization" in headers:
+            await self.app(scope, receive, send)
+            return
+
+        key = (scope["path"], scope["query_string"])
+        if_none_match = headers.get(b"if-none-match")
+        entry = page_cache.get(key)
+        if entry is not None:
+            await self._send_entry(entry, if_none_match, send)
+            return
+
+        generation = page_cache.generation
+        start_message = None
+        chunks = []
+
+        async def capture(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+
+        body = b"".join(chunks)
+        response_headers = [
+            (name, value) for name, value in start_message["headers"]
+            if name not in (b"content-length", b"etag")
+        ]
+        content_type = dict(response_headers).get(b"content-type", b"")
+        if start_message["status"] != 200 or not content_type.startswith(b"text/html"):
+            await send({**start_message, "headers": response_headers + [
+                (b"content-length", str(len(body)).encode())
+            ]})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        entry = {
+            "body": body,
+            "headers": response_headers,
+            # Слабый ETag: GZipMiddleware снаружи меняет байты ответа, но не его смысл.
+            # Считается по телу, а не по page_cache.generation: счетчик свой в каждом
+            # воркере и обнуляется при рестарте, так что разные страницы получали бы
+            # одинаковый ETag. Рендер и так пропускается, пока запись в кэше жива
+            "etag": b'W/"' + hashlib.sha256(body).hexdigest()[:32].encode() + b'"',
+        }
+        page_cache.set(key, entry, generation)
+        await self._send_entry(entry, if_none_match, send)
+
+    async def _send_entry(self, entry, if_none_match, send):
+        etag_headers = [(b"etag", entry["etag"]), (b"cache-control", b"no-cache")]
+        if if_none_match is not None and _etag_matches(if_none_match, entry["etag"]):
+            await send({"type": "http.response.start", "status": 304, "headers": etag_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        headers = entry["headers"] + etag_headers + [
+            (b"content-length", str(len(entry["body"])).encode())
+        ]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": entry["body"]})
@@ -0,0 +1,29 @@
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+
+# Курсор — непрозрачная для клиента строка: base64 от JSON с ключом последней строки страницы
+
+
+def encode_cursor(**key) -> str:
+    payload = {
+        name: value.isoformat() if isinstance(value, datetime) else value
+        for name, value in key.items()
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, **fields) -> dict:
+    """Разбирает курсор; fields задает ожидаемые ключи и их типы (int или datetime)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        return {
+            name: datetime.fromisoformat(payload[name]) if kind is datetime else kind(payload[name])
+            for name, kind in fields.items()
+        }
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolStats:
+    """Счетчики выдачи соединений из пула: ожидание и пиковая загрузка."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidated = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.in_use_peak = 0
+        self.overflow_peak = 0
+        self._lock = threading.Lock()
+
+    def record(self, wait: float, in_use: int = 0, overflow: int = 0, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.in_use_peak = max(self.in_use_peak, in_use)
+            self.overflow_peak = max(self.overflow_peak, overflow)
+
+    def count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidated": self.invalidated,
+                "wait_total_ms": 1000 * self.wait_total,
+                "wait_avg_ms": 1000 * self.wait_total / self.checkouts if self.checkouts else 0.0,
+                "wait_max_ms": 1000 * self.wait_max,
+                "in_use_peak": self.in_use_peak,
+                "overflow_peak": self.overflow_peak,
+            }
+
+
+class _InstrumentedPoolMixin:
+    # Событие checkout приходит уже после получения соединения, поэтому
+    # ожидание в очереди пула меряем вокруг _do_get
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - started,
+                          in_use=self.checkedout(), overflow=max(0, self.overflow()))
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine):
+    """Считает новые физические соединения и отброшенные (pre_ping, recycle, ошибки)."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    def counter(name):
+        def listener(*args):
+            # После dispose() у движка новый пул, поэтому берем его при каждом событии
+            stats = getattr(sync_engine.pool, "stats", None)
+            if stats is not None:
+                stats.count(name)
+        return listener
+
+    event.listen(sync_engine, "connect", counter("connects"))
+    event.listen(sync_engine, "invalidate", counter("invalidated"))
+    event.listen(sync_engine, "soft_invalidate", counter("invalidated"))
+
+
+def pool_status(engine):
+    pool = getattr(engine, "sync_engine", engine).pool
+    status = {"pool": type(pool).__name__, "pid": os.getpid()}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+            "max_overflow": pool._max_overflow,
+        })
+    if isinstance(pool, _InstrumentedPoolMixin):
+        status.update(pool.stats.snapshot())
+    return status
@@ -0,0 +1,203 @@
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+import jinja2
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Профилирование запросов включается явно: PROFILING=1
+PROFILING_ENABLED = os.getenv("PROFILING", "0").lower() in ("1", "true", "yes")
+# Запросы дольше порога пишутся в лог вместе со списком SQL
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+# Семплирующий профайлер для одного запроса по заголовку X-Profile: 1
+PROFILE_SAMPLER_ENABLED = os.getenv("PROFILE_SAMPLER", "0").lower() in ("1", "true", "yes")
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "1"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "dance-school-profiles"))
+
+logger = logging.getLogger(__name__)
+
+_current_profile: ContextVar = ContextVar("request_profile", default=None)
+# Одновременно работает не больше одного семплера: он меняет switchinterval всего процесса
+_sampler_lock = threading.Lock()
+
+
+class RequestProfile:
+    """Время запроса по частям: SQL, рендеринг шаблонов и все остальное."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.statements = []
+
+    def add_statement(self, statement, duration):
+        self.db_time += duration
+        self.statements.append((statement, duration))
+
+    def server_timing(self, total):
+        app_time = max(0.0, total - self.db_time - self.render_time)
+        return (f'db;dur={1000 * self.db_time:.2f}, db-count;desc="{len(self.statements)}", '
+                f'render;dur={1000 * self.render_time:.2f}, app;dur={1000 * app_time:.2f}, '
+                f'total;dur={1000 * total:.2f}')
+
+
+# События SQLAlchemy вызываются в контексте запроса: и в потоке threadpool
+# (sync-маршруты), и в гринлете асинхронного движка
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    started = conn.info.get("profile_started")
+    if profile is not None and started:
+        profile.add_statement(statement, time.perf_counter() - started.pop())
+
+
+class TimedTemplate(jinja2.Template):
+    """Шаблон, который добавляет время рендеринга в профиль текущего запроса."""
+
+    def render(self, *args, **kwargs):
+        profile = _current_profile.get()
+        if profile is None:
+            return super().render(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            profile.render_time += time.perf_counter() - started
+
+
+def instrument(templates):
+    """Подключает хуки SQLAlchemy и Jinja2. Вызывается один раз при старте приложения."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    templates.env.template_class = TimedTemplate
+
+
+# Кадры, в которых поток простаивает: такие семплы не попадают в профиль
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "thread.py")
+
+
+class StackSampler:
+    """Периодически снимает стеки всех потоков и копит их в формате collapsed stacks.
+
+    Результат открывается flamegraph.pl, speedscope или inferno без конвертации.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        # Поток семплера получает GIL не чаще, чем раз в switchinterval (5 мс по умолчанию)
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval))
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or frame.f_code.co_filename.endswith(_IDLE_FILES):
+                    continue
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def dump(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _slug(path: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", path).strip("-") or "root"
+
+
+class ProfilingMiddleware:
+    """ASGI middleware: Server-Timing для каждого ответа и лог медленных запросов.
+
+    С PROFILE_SAMPLER=1 запрос с заголовком X-Profile: 1 дополнительно снимается
+    семплирующим профайлером, путь к файлу возвращается в X-Profile-File.
+    """
+
+    def __init__(self, app, slow_request_ms=SLOW_REQUEST_MS, sampler_enabled=PROFILE_SAMPLER_ENABLED):
+        self.app = app
+        self.slow_request = slow_request_ms / 1000
+        self.sampler_enabled = sampler_enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        sampler = None
+        if (self.sampler_enabled and dict(scope["headers"]).get(b"x-profile") == b"1"
+                and _sampler_lock.acquire(blocking=False)):
+            sampler = StackSampler(PROFILE_SAMPLE_INTERVAL_MS / 1000)
+            sampler.start()
+
+        async def send_with_timing(message):
+            nonlocal sampler
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - profile.started
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing(total).encode()))
+                if sampler is not None:
+                    finished, sampler = sampler, None
+                    finished.stop()
+                    _sampler_lock.release()
+                    profile_file = os.path.join(
+                        PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{scope['method']}-{_slug(scope['path'])}.collapsed"
+                    )
+                    finished.dump(profile_file)
+                    headers.append((b"x-profile-file", profile_file.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_profile.reset(token)
+            if sampler is not None:
+                sampler.stop()
+                _sampler_lock.release()
+            total = time.perf_counter() - profile.started
+            if total >= self.slow_request:
+                self._log_slow(scope, profile, total)
+
+    def _log_slow(self, scope, profile, total):
+        lines = [f"{1000 * duration:8.2f} ms  {' '.join(statement.split())}"
+                 for statement, duration in profile.statements]
+        logger.warning(
+            "Медленный запрос %s %s: %.1f ms (SQL %.1f ms, %d запросов; шаблоны %.1f ms)\n%s",
+            scope["method"], scope["path"], 1000 * total, 1000 * profile.db_time,
+            len(profile.statements), 1000 * profile.render_time, "\n".join(lines),
+        )
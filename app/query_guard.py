@@ -0,0 +1,114 @@
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Детектор N+1 для разработки: "off", "warn" (в лог) или "raise" (исключение после ответа:
+# uvicorn пишет его в лог, TestClient пробрасывает в тест)
+QUERY_GUARD = os.getenv("QUERY_GUARD", "off").lower()
+# Сколько одинаковых по форме запросов за один HTTP-запрос считается N+1
+QUERY_GUARD_THRESHOLD = int(os.getenv("QUERY_GUARD_THRESHOLD", "3"))
+
+logger = logging.getLogger(__name__)
+
+_current_log: ContextVar = ContextVar("query_log", default=None)
+# Логи detect_n_plus_one(): видят запросы всех потоков, включая event loop TestClient
+_global_logs = []
+_global_lock = threading.Lock()
+
+_IN_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)\s*\)")
+_TRANSACTION = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "PRAGMA")
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+def statement_shape(statement: str) -> str:
+    """Текст запроса без различий в числе параметров IN (...) и в пробелах."""
+    return _IN_LIST.sub("(?)", " ".join(statement.split()))
+
+
+class QueryLog:
+    """Формы запросов, выполненных за один HTTP-запрос или блок кода."""
+
+    def __init__(self):
+        self.shapes = Counter()
+
+    def add(self, statement: str):
+        if not statement.lstrip().upper().startswith(_TRANSACTION):
+            self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int = QUERY_GUARD_THRESHOLD):
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    def report(self, threshold: int = QUERY_GUARD_THRESHOLD) -> str:
+        return "\n".join(f"{count} x {shape}" for shape, count in self.repeated(threshold))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    log = _current_log.get()
+    if log is not None:
+        log.add(statement)
+    if _global_logs:
+        with _global_lock:
+            for global_log in _global_logs:
+                global_log.add(statement)
+
+
+def install():
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+
+
+@contextmanager
+def detect_n_plus_one(threshold: int = QUERY_GUARD_THRESHOLD):
+    """Проверка для тестов и скриптов: NPlusOneError, если запрос повторился threshold раз.
+
+        with detect_n_plus_one():
+            client.get("/news")
+    """
+    install()
+    log = QueryLog()
+    with _global_lock:
+        _global_logs.append(log)
+    try:
+        yield log
+    finally:
+        with _global_lock:
+            _global_logs.remove(log)
+    if log.repeated(threshold):
+        raise NPlusOneError("Повторяющиеся запросы (N+1):\n" + log.report(threshold))
+
+
+class QueryGuardMiddleware:
+    """ASGI middleware: ищет N+1 в каждом запросе и пишет в лог или падает."""
+
+    def __init__(self, app, mode=QUERY_GUARD, threshold=QUERY_GUARD_THRESHOLD):
+        self.app = app
+        self.mode = mode
+        self.threshold = threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog()
+        token = _current_log.set(log)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_log.reset(token)
+
+        if log.repeated(self.threshold):
+            message = f"N+1 в {scope['method']} {scope['path']}:\n{log.report(self.threshold)}"
+            if self.mode == "raise":
+                raise NPlusOneError(message)
+            logger.warning(message)
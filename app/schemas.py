@@ -1,6 +1,10 @@
-from pydantic import BaseModel, EmailStr
-from datetime import datetime
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field, PlainSerializer, model_validator
+from datetime import datetime, time
+from typing import Annotated, Literal, Optional, List
+from .models import WEEK_DAYS
+
+# В JSON время занятия — "ЧЧ:ММ", как до перехода на столбцы типа TIME
+ScheduleTime = Annotated[time, PlainSerializer(lambda value: value.strftime("%H:%M"), return_type=str, when_used="json")]
 
 
 class DanceClassBase(BaseModel):
@@ -10,6 +14,7 @@ class DanceClassBase(BaseModel):
     duration: Optional[int] = None
     price: Optional[float] = None
     image_url: Optional[str] = None
+    capacity: Optional[int] = Field(None, ge=0)
 
 
 class DanceClassCreate(DanceClassBase):
@@ -24,6 +29,11 @@ class DanceClass(DanceClassBase):
         from_attributes = True
 
 
+class DanceClassPage(BaseModel):
+    items: List[DanceClass]
+    next_cursor: Optional[str] = None
+
+
 class TeacherBase(BaseModel):
     name: str
     bio: Optional[str] = None
@@ -43,17 +53,32 @@ class Teacher(TeacherBase):
         from_attributes = True
 
 
+class TeacherPage(BaseModel):
+    items: List[Teacher]
+    next_cursor: Optional[str] = None
+
+
 class ScheduleBase(BaseModel):
     dance_class_id: int
     teacher_id: int
     day_of_week: Optional[str] = None
-    start_time: Optional[str] = None
-    end_time: Optional[str] = None
+    start_time: Optional[ScheduleTime] = None
+    end_time: Optional[ScheduleTime] = None
     room: Optional[str] = None
 
 
 class ScheduleCreate(ScheduleBase):
-    pass
+    # Для проверки пересечений слот должен быть полностью определен
+    day_of_week: Literal[tuple(WEEK_DAYS)]
+    start_time: ScheduleTime
+    end_time: ScheduleTime
+    room: str = Field(..., min_length=1, max_length=50)
+
+    @model_validator(mode="after")
+    def check_interval(self):
+        if self.end_time <= self.start_time:
+            raise ValueError("end_time must be after start_time")
+        return self
 
 
 class Schedule(ScheduleBase):
@@ -63,6 +88,33 @@ class Schedule(ScheduleBase):
         from_attributes = True
 
 
+class ScheduleEntry(BaseModel):
+    id: int
+    dance_class_id: int
+    class_name: str
+    teacher_id: int
+    teacher_name: Optional[str] = None
+    day_of_week: Optional[str] = None
+    start_time: Optional[ScheduleTime] = None
+    end_time: Optional[ScheduleTime] = None
+    room: Optional[str] = None
+
+
+class ScheduleConflict(BaseModel):
+    kind: str  # "room" или "teacher"
+    slot: Schedule
+
+
+class ScheduleOverlap(ScheduleConflict):
+    # Слот, с которым пересекается slot (оба уже в БД)
+    overlaps: Schedule
+
+
+class ScheduleDay(BaseModel):
+    day: str
+    items: List[ScheduleEntry]
+
+
 class StudentBase(BaseModel):
     name: str
     email: EmailStr
@@ -100,6 +152,44 @@ class Registration(RegistrationBase):
         from_attributes = True
 
 
+class RegistrationCancel(BaseModel):
+    registration: Registration
+    # Заявка из листа ожидания, получившая освободившееся место
+    promoted_registration_id: Optional[int] = None
+
+
+class ClassCapacity(BaseModel):
+    # None — без ограничения
+    capacity: Optional[int] = Field(None, ge=0)
+
+
+class ClassEnrollment(BaseModel):
+    dance_class_id: int
+    capacity: Optional[int] = None
+    seats_taken: int
+    waitlist_size: int
+    # Начало очереди по порядку
+    waitlist: List[Registration]
+
+
+class ImportFieldError(BaseModel):
+    field: str
+    message: str
+
+
+class ImportRowError(BaseModel):
+    row: int
+    errors: List[ImportFieldError]
+
+
+class ImportReport(BaseModel):
+    total: int
+    inserted: int
+    skipped: int
+    waitlisted: int = 0  # только для заявок: вставлены, но мест не хватило
+    errors: List[ImportRowError]
+
+
 class UserBase(BaseModel):
     email: EmailStr
     full_name: Optional[str] = None
@@ -139,12 +229,41 @@ class NewsCreate(NewsBase):
     pass
 
 
+class NewsAuthor(BaseModel):
+    id: int
+    full_name: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
 class News(NewsBase):
     id: int
     author_id: int
+    author: Optional[NewsAuthor] = None
     is_published: bool
     created_at: datetime
     updated_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class NewsPage(BaseModel):
+    items: List[News]
+    next_cursor: Optional[str] = None
+
+
+class SearchResult(BaseModel):
+    kind: str  # "news", "class" или "teacher"
+    id: int
+    title: str
+    # HTML: текст экранирован, совпадения обернуты в <mark>
+    snippet: str
+    url: str
+    score: float
+
+
+class SearchResults(BaseModel):
+    query: str
+    items: List[SearchResult]
@@ -0,0 +1,209 @@
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from markupsafe import Markup, escape
+from sqlalchemy import Float, Integer, String, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Полнотекстовый поиск по новостям, направлениям и преподавателям.
+# SQLite: FTS5-таблица на каждую исходную (external content, текст не дублируется),
+# Postgres: генерируемый столбец tsvector с GIN-индексом. Индекс обновляют триггеры
+# и сама БД, поэтому любой путь записи (crud, импорт, init_db, SQL руками) его не обходит
+SEARCH_LIMIT = int(os.getenv("SEARCH_LIMIT", "20"))
+SEARCH_MAX_TERMS = 8
+SNIPPET_WORDS = 16
+
+# Символы из области частного использования: не встречаются в тексте и
+# переживают экранирование HTML, после которого превращаются в <mark>
+MARK_START = "\ue000"
+MARK_END = "\ue001"
+
+Source = namedtuple("Source", "kind table title body visible url weights")
+
+# weights — веса столбцов (title, *body) для bm25 в SQLite; в Postgres это A/B/C
+SOURCES = (
+    Source("news", "news", "title", ("content",), "is_published", "/news/{id}", (10.0, 1.0)),
+    Source("class", "dance_classes", "name", ("description", "level"), "is_active",
+           "/classes#class-{id}", (10.0, 1.0, 2.0)),
+    Source("teacher", "teachers", "name", ("specialization", "bio"), "is_active",
+           "/teachers#teacher-{id}", (10.0, 5.0, 1.0)),
+)
+SOURCES_BY_KIND = {source.kind: source for source in SOURCES}
+
+
+def _fts_table(source):
+    return f"{source.table}_fts"
+
+
+def _fold(expression):
+    # unicode61 не приравнивает ё к е, а стеммер запроса уже выдает е
+    return f"replace(replace({expression}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def sqlite_ddl(source):
+    """FTS5-таблица и триггеры синхронизации для одной исходной таблицы."""
+    fts = _fts_table(source)
+    columns = (source.title,) + source.body
+    names = ", ".join(columns)
+    new = ", ".join(_fold(f"new.{column}") for column in columns)
+    old = ", ".join(_fold(f"old.{column}") for column in columns)
+    weights = ", ".join(str(weight) for weight in source.weights)
+    return [
+        # prefix: запросы "основа*" идут по готовому индексу префиксов, а не перебором словаря
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, "
+        f"content='{source.table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+        f"INSERT INTO {fts}({fts}, rank) VALUES ('rank', 'bm25({weights})')",
+        # Скрытые записи в индекс не попадают; 'delete' получает те же значения, что индексировались
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {source.table} "
+        f"WHEN new.{source.visible} BEGIN "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {source.table} "
+        f"WHEN old.{source.visible} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names}, {source.visible} "
+        f"ON {source.table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) SELECT 'delete', old.id, {old} WHERE old.{source.visible}; "
+        f"INSERT INTO {fts}(rowid, {names}) SELECT new.id, {new} WHERE new.{source.visible}; END",
+    ]
+
+
+def sqlite_rebuild(source):
+    """Переиндексация с нуля: 'rebuild' FTS5 взял бы и скрытые записи, и ё без замены."""
+    fts = _fts_table(source)
+    columns = (source.title,) + source.body
+    names = ", ".join(columns)
+    values = ", ".join(_fold(column) for column in columns)
+    return [
+        f"INSERT INTO {fts}({fts}) VALUES ('delete-all')",
+        f"INSERT INTO {fts}(rowid, {names}) SELECT id, {values} FROM {source.table} WHERE {source.visible}",
+    ]
+
+
+def _tsvector(source):
+    parts = [f"setweight(to_tsvector('russian', coalesce({source.title}, '')), 'A')"]
+    for column, weight in zip(source.body, "BC"):
+        parts.append(f"setweight(to_tsvector('russian', coalesce({column}, '')), '{weight}')")
+    return " || ".join(parts)
+
+
+def postgres_ddl(source):
+    """Генерируемый tsvector (Postgres 12+) и GIN-индекс для одной исходной таблицы."""
+    return [
+        f"ALTER TABLE {source.table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({_tsvector(source)}) STORED",
+        f"CREATE INDEX IF NOT EXISTS ix_{source.table}_search_vector ON {source.table} USING gin (search_vector)",
+    ]
+
+
+def create_search_index(target, connection, **kw):
+    """Обработчик after_create для Base.metadata: индекс появляется вместе с таблицами."""
+    dialect = connection.dialect.name
+    for source in SOURCES:
+        if dialect == "sqlite":
+            statements = sqlite_ddl(source) + sqlite_rebuild(source)
+        elif dialect == "postgresql":
+            statements = postgres_ddl(source)
+        else:
+            continue
+        for statement in statements:
+            connection.exec_driver_sql(statement)
+
+
+@lru_cache(maxsize=1)
+def _stemmer():
+    import snowballstemmer
+    return snowballstemmer.stemmer("russian")
+
+
+def fts5_query(q: str):
+    """Запрос пользователя в синтаксис MATCH: основы слов с префиксным поиском.
+
+    У FTS5 нет русского стеммера, поэтому основа слова ("танцевальн") ищется
+    как префикс и находит все его формы. Слишком короткие основы ищутся целым словом.
+    """
+    words = re.findall(r"\w+", q.lower().replace("ё", "е"))[:SEARCH_MAX_TERMS]
+    terms = []
+    for word in words:
+        stem = _stemmer().stemWord(word)
+        terms.append(f'"{stem}"*' if len(stem) >= 3 else f'"{word}"')
+    return " ".join(terms)
+
+
+def _sqlite_search_sql():
+    parts = []
+    for source in SOURCES:
+        fts = _fts_table(source)
+        # ORDER BY rank LIMIT внутри FTS5: сниппеты строятся только для лучших совпадений
+        parts.append(
+            f"SELECT '{source.kind}' AS kind, s.id AS id, s.{source.title} AS title, "
+            f"hits.snippet AS snippet, hits.score AS score "
+            f"FROM (SELECT rowid AS id, snippet({fts}, -1, :start, :stop, '…', :words) AS snippet, "
+            f"-rank AS score FROM {fts} WHERE {fts} MATCH :query ORDER BY rank LIMIT :limit) AS hits "
+            f"JOIN {source.table} AS s ON s.id = hits.id"
+        )
+    return " UNION ALL ".join(parts) + " ORDER BY score DESC LIMIT :limit"
+
+
+def _postgres_search_sql():
+    parts = []
+    for source in SOURCES:
+        body = f"concat_ws(' ', {', '.join(source.body)})" if len(source.body) > 1 else source.body[0]
+        parts.append(
+            f"(SELECT '{source.kind}' AS kind, id, {source.title} AS title, {body} AS body, "
+            f"ts_rank_cd(search_vector, q.query) AS score FROM {source.table}, q "
+            f"WHERE {source.visible} AND search_vector @@ q.query ORDER BY score DESC LIMIT :limit)"
+        )
+    # ts_headline дорогой: считается только для отобранных строк
+    return (
+        "WITH q AS (SELECT websearch_to_tsquery('russian', :query) AS query) "
+        "SELECT kind, id, title, ts_headline('russian', body, q.query, :options) AS snippet, score "
+        f"FROM ({' UNION ALL '.join(parts)}) AS hits, q ORDER BY score DESC LIMIT :limit"
+    )
+
+
+def _search_statement(sql):
+    # TextualSelect, а не голый text(): RoutingSession отправит его в пул читателей
+    return text(sql).columns(kind=String, id=Integer, title=String, snippet=String, score=Float)
+
+
+_STATEMENTS = {
+    "sqlite": _search_statement(_sqlite_search_sql()),
+    "postgresql": _search_statement(_postgres_search_sql()),
+}
+
+
+def highlight(snippet: str) -> Markup:
+    """Сниппет как безопасный HTML: текст экранирован, совпадения — в <mark>."""
+    return Markup(str(escape(snippet or "")).replace(MARK_START, "<mark>").replace(MARK_END, "</mark>"))
+
+
+async def search(db: AsyncSession, q: str, limit: int = SEARCH_LIMIT):
+    """Лучшие совпадения по всем источникам, по убыванию релевантности."""
+    dialect = db.bind.dialect.name
+    if dialect == "sqlite":
+        query = fts5_query(q)
+        params = {"query": query, "start": MARK_START, "stop": MARK_END, "words": SNIPPET_WORDS}
+    else:
+        query = q.strip()
+        params = {"query": query, "options": (
+            f"StartSel={MARK_START}, StopSel={MARK_END}, MaxWords={SNIPPET_WORDS}, "
+            "MinWords=5, MaxFragments=2, FragmentDelimiter=\" … \""
+        )}
+    if not query:
+        return []
+
+    result = await db.execute(_STATEMENTS[dialect], {**params, "limit": limit})
+    return [
+        {
+            "kind": row.kind,
+            "id": row.id,
+            "title": row.title,
+            "snippet": highlight(row.snippet),
+            "url": SOURCES_BY_KIND[row.kind].url.format(id=row.id),
+            "score": row.score,
+        }
+        for row in result
+    ]
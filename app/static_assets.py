@@ -0,0 +1,81 @@
+import json
+import os
+
+from starlette.datastructures import Headers
+from starlette.staticfiles import StaticFiles
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+# Каталог сборки build_static.py: файлы с хешем содержимого в имени и их .gz/.br
+BUILD_DIR = "dist"
+MANIFEST_PATH = os.path.join(STATIC_DIR, BUILD_DIR, "manifest.json")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Сжатие динамических ответов (HTML, JSON) на лету
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+
+# Предпочтение сервера: brotli меньше, gzip понимают все
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+def load_manifest(path: str = MANIFEST_PATH):
+    # Без сборки (локальная разработка) манифеста нет — ссылки ведут на исходные файлы
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+manifest = load_manifest()
+
+
+def static_url(name: str) -> str:
+    """URL статического файла для шаблонов: с хешем, если ассеты собраны."""
+    return "/static/" + manifest.get(name, name)
+
+
+def _accepted_encodings(header: str):
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles, который отдает собранные ассеты готовыми .br/.gz и кэширует их навсегда.
+
+    Имя собранного файла меняется вместе с содержимым, поэтому браузеру не нужно
+    его перепроверять. Остальные файлы отдаются как обычно, с ETag и Last-Modified.
+    """
+
+    async def get_response(self, path: str, scope):
+        if path.split(os.sep, 1)[0] != BUILD_DIR or path.endswith(".json"):
+            return await super().get_response(path, scope)
+
+        accepted = _accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        for encoding, suffix in PRECOMPRESSED:
+            if encoding not in accepted:
+                continue
+            full_path, stat_result = self.lookup_path(path + suffix)
+            if stat_result is not None:
+                # Тип берется по имени без суффикса: mimetypes считает .br/.gz кодировкой
+                response = self.file_response(full_path, stat_result, scope)
+                response.headers["Content-Encoding"] = encoding
+                break
+        else:
+            response = await super().get_response(path, scope)
+
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+            response.headers["Vary"] = "Accept-Encoding"
+        return response
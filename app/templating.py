@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+
+import jinja2
+from fastapi.templating import Jinja2Templates
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+# Скомпилированные шаблоны общие для всех воркеров и переживают перезапуск.
+# Ключ — имя и контрольная сумма исходника, так что правка шаблона не требует очистки.
+# Пустое значение отключает кэш
+JINJA_CACHE_DIR = os.getenv("JINJA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "dance-school-jinja"))
+
+
+def create_templates(directory: str = TEMPLATES_DIR, cache_dir: str = JINJA_CACHE_DIR):
+    templates = Jinja2Templates(directory=directory)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        templates.env.bytecode_cache = jinja2.FileSystemBytecodeCache(cache_dir)
+    return templates
+
+
+def warm_up(env: jinja2.Environment) -> int:
+    """Компилирует все шаблоны заранее. Синтаксическая ошибка прерывает запуск воркера."""
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+def check(env: jinja2.Environment):
+    """Возвращает все синтаксические ошибки шаблонов, а не только первую."""
+    errors = []
+    for name in env.list_templates(extensions=["html"]):
+        source, filename, _ = env.loader.get_source(env, name)
+        try:
+            env.parse(source, name, filename)
+        except jinja2.TemplateSyntaxError as exc:
+            errors.append(f"{name}:{exc.lineno}: {exc.message}")
+    return errors
+
+
+if __name__ == "__main__":
+    # python -m app.templating — проверка шаблонов в CI без запуска приложения
+    errors = check(create_templates(cache_dir="").env)
+    for error in errors:
+        print(error)
+    sys.exit(1 if errors else 0)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Сравнение пропускной способности /schedule и / до и после перехода на асинхронный доступ к БД.
+
+"До" воспроизводит старые обработчики: async def с синхронной Session внутри.
+"После" — текущие маршруты app.main с AsyncSession.
+Выигрыш растет с задержкой запросов к БД: на локальном SQLite с запросами
+короче миллисекунды переход в поток aiosqlite может стоить дороже, чем экономит.
+--db-latency-ms добавляет к каждому запросу задержку, как у сетевой БД: синхронный
+драйвер на это время блокирует event loop, асинхронный — отдает его другим запросам.
+Либо мерить против той БД, что в продакшене (DATABASE_URL).
+
+    python benchmarks/async_db.py --requests 500 --concurrency 50 --db-latency-ms 2
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+# Отключаем кэши, чтобы каждый запрос доходил до БД
+os.environ["CATALOG_CACHE_TTL"] = "0"
+os.environ["PAGE_CACHE_TTL"] = "0"
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+
+import httpx
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import HTMLResponse
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.util import await_only
+
+import init_db
+from app import crud
+from app.database import DATABASE_URL, async_engine, async_read_engine, create_sqlite_engines
+from app.main import app, templates
+from app.page_cache import PageCacheMiddleware
+
+
+def add_latency(engine, seconds, is_async):
+    """Задержка перед каждым запросом к БД, как сетевой round-trip."""
+    @event.listens_for(getattr(engine, "sync_engine", engine), "before_cursor_execute")
+    def wait(*args):
+        if is_async:
+            # Синхронный код асинхронного движка работает в greenlet: ждем, не блокируя loop
+            await_only(asyncio.sleep(seconds))
+        else:
+            time.sleep(seconds)
+
+
+def build_blocking_app(latency):
+    # Как было до перехода: один синхронный движок с настройками по умолчанию.
+    # С ограниченным пулом читателей блокирующий checkout внутри event loop зависает
+    blocking_engine, _ = create_sqlite_engines(DATABASE_URL, profile="default")
+    if latency:
+        add_latency(blocking_engine, latency, is_async=False)
+    BlockingSession = sessionmaker(autocommit=False, autoflush=False, bind=blocking_engine)
+
+    def get_db():
+        db = BlockingSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    blocking = FastAPI()
+    blocking.add_middleware(PageCacheMiddleware)
+
+    @blocking.get("/", response_class=HTMLResponse)
+    async def read_root(request: Request, db: Session = Depends(get_db)):
+        classes = crud.get_dance_classes(db)
+        teachers = crud.get_teachers(db)
+        return templates.TemplateResponse("index.html", {
+            "request": request, "classes": classes, "teachers": teachers
+        })
+
+    @blocking.get("/schedule", response_class=HTMLResponse)
+    async def read_schedule(request: Request, db: Session = Depends(get_db)):
+        schedule = crud.get_schedule(db)
+        classes = crud.get_dance_classes(db)
+        teachers = crud.get_teachers(db)
+        return templates.TemplateResponse("schedule.html", {
+            "request": request,
+            "schedule": schedule,
+            "class_map": {cls.id: cls.name for cls in classes},
+            "teacher_map": {teacher.id: teacher.name for teacher in teachers},
+        })
+
+    return blocking
+
+
+async def run(asgi_app, path, total, concurrency):
+    transport = httpx.ASGITransport(app=asgi_app)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        await one()  # прогрев
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+
+    # Пулы асинхронных движков привязаны к event loop, а каждый прогон — новый asyncio.run
+    await async_engine.dispose()
+    await async_read_engine.dispose()
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--db-latency-ms", type=float, default=0, help="задержка каждого запроса к БД")
+    args = parser.parse_args()
+
+    init_db.init_db()
+    latency = args.db_latency_ms / 1000
+    blocking = build_blocking_app(latency)
+    if latency:
+        add_latency(async_engine, latency, is_async=True)
+        if async_read_engine is not async_engine:
+            add_latency(async_read_engine, latency, is_async=True)
+
+    print(f"{'route':<12}{'before, req/s':>16}{'after, req/s':>16}{'gain':>8}")
+    for path in ("/schedule", "/"):
+        before = asyncio.run(run(blocking, path, args.requests, args.concurrency))
+        after = asyncio.run(run(app, path, args.requests, args.concurrency))
+        print(f"{path:<12}{before:>16.1f}{after:>16.1f}{after / before:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""Нагрузочный прогон всех маршрутов app.main: задержки, пропускная способность, запросы к БД.
+
+По умолчанию приложение вызывается в том же процессе через ASGI, на временной
+SQLite с синтетическими данными (init_db.generate_synthetic). С --uvicorn
+запускается настоящий сервер, и запросы идут по сети; число запросов к БД
+тогда не считается — оно видно только внутри процесса приложения.
+
+    python benchmarks/http_suite.py --requests 300 --concurrency 20 --scale 0.1 \\
+        --output bench.json --compare bench-main.json
+
+Маршруты прогоняются по очереди, поэтому запросы к БД за время прогона
+маршрута делятся на число его запросов. Если DATABASE_URL задан, база не
+перезаписывается, пока не указан --seed-data.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+ADMIN_EMAIL = "admin@dancestudio.ru"
+ADMIN_PASSWORD = "admin123"
+
+
+class Scenario:
+    """Один маршрут: метод, путь и, при необходимости, тело запроса для каждого вызова."""
+
+    def __init__(self, name, method="GET", path=None, build=None, auth=False,
+                 max_requests=None, expect=(200,)):
+        self.name = name
+        self.method = method
+        self.path = path or name
+        self.build = build
+        self.auth = auth
+        # bcrypt на /token стоит сотни миллисекунд: ограничиваем, чтобы прогон не затягивался
+        self.max_requests = max_requests
+        self.expect = expect
+
+    def request(self, n):
+        kwargs = self.build(n) if self.build else {}
+        return self.method, kwargs.pop("path", self.path), kwargs
+
+
+_unique = itertools.count()
+
+
+def _registration_form(n):
+    i = next(_unique)
+    return {"data": {
+        "name": f"Бенчмарк {i}",
+        "email": f"bench-{uuid.uuid4().hex[:12]}@example.com",
+        "phone": "+7 900 000-00-00",
+        "level": "Начинающий",
+        "dance_class_id": 1 + i % 6,
+        "idempotency_key": uuid.uuid4().hex,
+    }}
+
+
+SCENARIOS = [
+    # Публичные страницы
+    Scenario("/"),
+    Scenario("/classes"),
+    Scenario("/teachers"),
+    Scenario("/schedule"),
+    Scenario("/prices"),
+    # /news/{id}, /login и /admin/login не включены: их шаблонов нет в app/templates
+    Scenario("/news"),
+    Scenario("/about"),
+    Scenario("/contacts"),
+    Scenario("/gallery"),
+    Scenario("/registration"),
+    # JSON API
+    Scenario("/api/classes"),
+    Scenario("/api/classes?cursor=", path="/api/classes?cursor=&limit=50"),
+    Scenario("/api/teachers"),
+    Scenario("/api/teachers?cursor=", path="/api/teachers?cursor=&limit=50"),
+    Scenario("/api/schedule"),
+    Scenario("/api/news"),
+    Scenario("/api/news?cursor=", path="/api/news?cursor=&limit=50"),
+    Scenario("/api/search", path="/api/search?q=танцевальный зал"),
+    Scenario("/search", path="/search?q=сальса"),
+    # Запись и авторизация
+    Scenario("POST /token", "POST", "/token", max_requests=50,
+             build=lambda n: {"data": {"username": ADMIN_EMAIL, "password": ADMIN_PASSWORD}}),
+    Scenario("POST /registration", "POST", "/registration", build=_registration_form, expect=(303,)),
+    # Админка
+    Scenario("/admin", auth=True),
+    Scenario("/api/admin/students", auth=True),
+    Scenario("/api/admin/registrations", auth=True),
+    # Полные выгрузки таблиц: каждая читает всю таблицу, поэтому запросов меньше
+    Scenario("/api/admin/export/students", auth=True, max_requests=20),
+    Scenario("/api/admin/export/registrations?format=ndjson",
+             path="/api/admin/export/registrations?format=ndjson", auth=True, max_requests=20),
+]
+
+
+class QueryCounter:
+    """Считает запросы ко всем движкам SQLAlchemy в процессе."""
+
+    def __init__(self):
+        self.count = 0
+
+    def install(self):
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            # BEGIN, который профиль SQLite отправляет сам, запросом не считаем
+            if not statement.startswith("BEGIN"):
+                self.count += 1
+
+        event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(client, scenario, total, concurrency, headers, queries):
+    total = min(total, scenario.max_requests or total)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(n):
+        nonlocal errors
+        method, path, kwargs = scenario.request(n)
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.request(method, path, headers=headers if scenario.auth else None,
+                                            follow_redirects=False, **kwargs)
+            latencies.append(time.perf_counter() - started)
+        if response.status_code not in scenario.expect:
+            errors += 1
+
+    await one(-1)  # прогрев: первый запрос заполняет кэши и пулы
+    latencies.clear()
+    errors = 0
+
+    queries_before = queries.count if queries else 0
+    started = time.perf_counter()
+    await asyncio.gather(*(one(n) for n in range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "req_per_s": total / elapsed,
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p95_ms": 1000 * percentile(latencies, 95),
+        "p99_ms": 1000 * percentile(latencies, 99),
+        "max_ms": 1000 * latencies[-1],
+        "db_queries_per_request": (queries.count - queries_before) / total if queries else None,
+    }
+
+
+async def run_suite(client, scenarios, total, concurrency, queries, after_each=None):
+    response = await client.post("/token", data={"username": ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+    response.raise_for_status()
+    headers = {"Authorization": "Bearer " + response.json()["access_token"]}
+
+    results = {}
+    for scenario in scenarios:
+        results[scenario.name] = await run_scenario(client, scenario, total, concurrency, headers, queries)
+        print_row(scenario.name, results[scenario.name])
+    if after_each is not None:
+        await after_each()
+    return results
+
+
+def print_header():
+    print(f"{'route':<28}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'errors':>8}")
+
+
+def print_row(name, row, baseline=None):
+    queries = "-" if row["db_queries_per_request"] is None else f"{row['db_queries_per_request']:.2f}"
+    line = (f"{name:<28}{row['req_per_s']:>9.1f}{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}"
+            f"{row['p99_ms']:>9.2f}{queries:>9}{row['errors']:>8}")
+    if baseline is not None:
+        line += f"{row['req_per_s'] / baseline['req_per_s']:>8.2f}x"
+    print(line)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn(workers):
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT, env=os.environ.copy(),
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn завершился при запуске")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return server, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("uvicorn не начал принимать соединения за 30 секунд")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300, help="запросов на маршрут")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--scale", type=float, default=0.1, help="масштаб синтетических данных")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--seed-data", action="store_true",
+                        help="заполнить базу из DATABASE_URL (по умолчанию только временную)")
+    parser.add_argument("--no-cache", action="store_true", help="отключить кэши каталога и страниц")
+    parser.add_argument("--uvicorn", action="store_true", help="гонять запросы через настоящий сервер")
+    parser.add_argument("--workers", type=int, default=1, help="воркеры uvicorn")
+    parser.add_argument("--only", action="append", default=[], help="только маршруты с этой подстрокой")
+    parser.add_argument("--output", help="сохранить результаты в JSON")
+    parser.add_argument("--compare", help="JSON предыдущего прогона для сравнения req/s")
+    args = parser.parse_args()
+
+    if args.no_cache:
+        os.environ["CATALOG_CACHE_TTL"] = "0"
+        os.environ["PAGE_CACHE_TTL"] = "0"
+    seed_data = args.seed_data or "DATABASE_URL" not in os.environ
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+
+    import httpx
+    import init_db
+
+    if seed_data:
+        init_db.init_db()
+        init_db.generate_synthetic(args.scale, args.seed)
+
+    scenarios = [s for s in SCENARIOS if not args.only or any(part in s.name for part in args.only)]
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["routes"]
+
+    print_header()
+    if args.uvicorn:
+        server, base_url = start_uvicorn(args.workers)
+        try:
+            async def over_network():
+                limits = httpx.Limits(max_connections=args.concurrency)
+                async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+                    return await run_suite(client, scenarios, args.requests, args.concurrency, None)
+            results = asyncio.run(over_network())
+        finally:
+            server.terminate()
+            server.wait()
+    else:
+        from app.database import async_engine, async_read_engine
+        from app.main import app
+
+        queries = QueryCounter()
+        queries.install()
+
+        async def dispose():
+            # Пулы асинхронных движков привязаны к event loop этого прогона
+            await async_engine.dispose()
+            await async_read_engine.dispose()
+
+        async def in_process():
+            transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+                return await run_suite(client, scenarios, args.requests, args.concurrency, queries, dispose)
+        results = asyncio.run(in_process())
+
+    if baseline:
+        print("\nСравнение с", args.compare)
+        print_header()
+        for name, row in results.items():
+            print_row(name, row, baseline.get(name))
+
+    if args.output:
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "mode": f"uvicorn x{args.workers}" if args.uvicorn else "asgi",
+                "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "scale": args.scale if seed_data else None,
+                "seed": args.seed if seed_data else None,
+                "cache": not args.no_cache,
+                "python": platform.python_version(),
+            },
+            "routes": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""Стресс-тест записи на направление с ограниченным числом мест: нет перепродажи мест.
+
+Направлению выставляется --capacity мест, затем --requests параллельных заявок
+от разных студентов идут через POST /registration. Проверяется, что места
+получили ровно capacity заявок, счетчик seats_taken с ними совпадает, а
+остальные стоят в листе ожидания. Потом --cancel владельцев мест параллельно
+отменяются, и места должны перейти к началу очереди в порядке подачи.
+
+    python benchmarks/registration_stress.py --capacity 20 --requests 500 --concurrency 50
+    python benchmarks/registration_stress.py --uvicorn --workers 2 --output stress.json
+
+Если DATABASE_URL задан, используется эта база (init_db не вызывается);
+выбранное направление получает новые заявки и измененное число мест.
+Код выхода 1 — найдено нарушение.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from http_suite import ADMIN_EMAIL, ADMIN_PASSWORD, git_commit, percentile, start_uvicorn  # noqa: E402
+
+
+async def timed(requests, concurrency):
+    """Запускает корутины-запросы с ограничением параллельности; (ответы, задержки, секунды)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(request):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await request()
+            latencies.append(time.perf_counter() - started)
+            return response
+
+    started = time.perf_counter()
+    responses = await asyncio.gather(*(one(request) for request in requests))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return responses, latencies, elapsed
+
+
+def stats(latencies, elapsed):
+    return {
+        "requests": len(latencies),
+        "req_per_s": len(latencies) / elapsed,
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p95_ms": 1000 * percentile(latencies, 95),
+        "p99_ms": 1000 * percentile(latencies, 99),
+        "max_ms": 1000 * latencies[-1],
+    }
+
+
+def _registration(client, dance_class_id, n):
+    return lambda: client.post("/registration", follow_redirects=False, data={
+        "name": f"Стресс {n}",
+        "email": f"stress-{n}-{uuid.uuid4().hex[:12]}@example.com",
+        "phone": "+7 900 000-00-00",
+        "level": "Начинающий",
+        "dance_class_id": dance_class_id,
+        "idempotency_key": uuid.uuid4().hex,
+    })
+
+
+async def class_registrations(client, headers, dance_class_id):
+    rows = []
+    while True:
+        response = await client.get("/api/admin/registrations", headers=headers,
+                                    params={"skip": len(rows), "limit": 500})
+        response.raise_for_status()
+        page = response.json()
+        rows.extend(page)
+        if len(page) < 500:
+            break
+    return sorted((row for row in rows if row["dance_class_id"] == dance_class_id), key=lambda row: row["id"])
+
+
+async def run(client, args):
+    violations = []
+    response = await client.post("/token", data={"username": ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+    response.raise_for_status()
+    headers = {"Authorization": "Bearer " + response.json()["access_token"]}
+    capacity_url = f"/api/admin/classes/{args.dance_class}/capacity"
+    enrollment_url = f"/api/admin/classes/{args.dance_class}/enrollment"
+
+    # Место в направлении уже могут занимать прежние заявки: свободных мест ровно capacity
+    response = await client.put(capacity_url, headers=headers, json={"capacity": None})
+    response.raise_for_status()
+    before = response.json()["seats_taken"]
+    existing = {row["id"] for row in await class_registrations(client, headers, args.dance_class)}
+    response = await client.put(capacity_url, headers=headers, json={"capacity": before + args.capacity})
+    response.raise_for_status()
+
+    responses, latencies, elapsed = await timed(
+        [_registration(client, args.dance_class, n) for n in range(args.requests)], args.concurrency
+    )
+    register = stats(latencies, elapsed)
+    register["errors"] = sum(response.status_code != 303 for response in responses)
+    register["waitlisted_redirects"] = sum("waitlist=" in response.headers.get("location", "")
+                                           for response in responses)
+    if register["errors"]:
+        violations.append(f"{register['errors']} заявок завершились не редиректом 303")
+
+    def check(stage, expected_holders):
+        holders = [row for row in rows if row["status"] in ("pending", "confirmed")]
+        waitlisted = [row for row in rows if row["status"] == "waitlisted"]
+        if len(holders) > args.capacity:
+            violations.append(f"{stage}: мест выдано {len(holders)} при {args.capacity}")
+        elif len(holders) != expected_holders:
+            violations.append(f"{stage}: мест выдано {len(holders)}, ожидалось {expected_holders}")
+        if enrollment["seats_taken"] - before != len(holders):
+            violations.append(f"{stage}: seats_taken {enrollment['seats_taken'] - before}, "
+                              f"а заявок с местом {len(holders)}")
+        if enrollment["waitlist_size"] != len(waitlisted):
+            violations.append(f"{stage}: waitlist_size {enrollment['waitlist_size']}, "
+                              f"а в очереди {len(waitlisted)}")
+        return holders, waitlisted
+
+    rows = [row for row in await class_registrations(client, headers, args.dance_class) if row["id"] not in existing]
+    enrollment = (await client.get(enrollment_url, headers=headers)).json()
+    holders, waitlisted = check("запись", min(args.capacity, args.requests))
+    if register["waitlisted_redirects"] != len(waitlisted):
+        violations.append(f"в лист ожидания отправлено {register['waitlisted_redirects']} заявок, "
+                          f"а в очереди {len(waitlisted)}")
+
+    # Параллельная отмена: каждое освободившееся место получает следующая по очереди заявка
+    cancelled = holders[:args.cancel]
+    responses, latencies, elapsed = await timed(
+        [lambda row=row: client.post(f"/api/admin/registrations/{row['id']}/cancel", headers=headers)
+         for row in cancelled], args.concurrency
+    )
+    cancel = stats(latencies, elapsed) if latencies else None
+    if cancel is not None:
+        cancel["errors"] = sum(response.status_code != 200 for response in responses)
+        if cancel["errors"]:
+            violations.append(f"{cancel['errors']} отмен завершились ошибкой")
+    promoted = sorted(response.json()["promoted_registration_id"] for response in responses
+                      if response.status_code == 200 and response.json()["promoted_registration_id"])
+    expected = [row["id"] for row in waitlisted[:len(cancelled)]]
+    if promoted != expected:
+        violations.append(f"повышены заявки {promoted[:10]}…, ожидались первые в очереди {expected[:10]}…")
+
+    rows = [row for row in await class_registrations(client, headers, args.dance_class) if row["id"] not in existing]
+    enrollment = (await client.get(enrollment_url, headers=headers)).json()
+    rows = [row for row in rows if row["status"] != "cancelled"]
+    check("отмена", min(args.capacity, args.requests - len(cancelled)))
+
+    return {"register": register, "cancel": cancel, "violations": violations}
+
+
+def print_row(name, row):
+    if row is None:
+        return
+    print(f"{name:<12}{row['requests']:>9}{row['req_per_s']:>9.1f}{row['p50_ms']:>9.2f}"
+          f"{row['p95_ms']:>9.2f}{row['p99_ms']:>9.2f}{row['errors']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--capacity", type=int, default=20, help="мест на направлении")
+    parser.add_argument("--requests", type=int, default=500, help="параллельных заявок")
+    parser.add_argument("--cancel", type=int, default=10, help="отменить владельцев мест")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--dance-class", type=int, default=1, help="id направления")
+    parser.add_argument("--uvicorn", action="store_true", help="гонять запросы через настоящий сервер")
+    parser.add_argument("--workers", type=int, default=1, help="воркеры uvicorn")
+    parser.add_argument("--output", help="сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "stress.db")
+        import init_db
+        init_db.init_db()
+
+    import httpx
+
+    if args.uvicorn:
+        server, base_url = start_uvicorn(args.workers)
+        try:
+            async def over_network():
+                limits = httpx.Limits(max_connections=args.concurrency)
+                async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+                    return await run(client, args)
+            results = asyncio.run(over_network())
+        finally:
+            server.terminate()
+            server.wait()
+    else:
+        from app.main import app
+
+        async def in_process():
+            transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            async with httpx.AsyncClient(transport=transport, base_url="http://stress", timeout=60) as client:
+                async with app.router.lifespan_context(app):
+                    return await run(client, args)
+        results = asyncio.run(in_process())
+
+    print(f"{'stage':<12}{'requests':>9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    print_row("register", results["register"])
+    print_row("cancel", results["cancel"])
+    for violation in results["violations"]:
+        print("НАРУШЕНИЕ:", violation)
+    if not results["violations"]:
+        print(f"Перепродажи нет: {args.capacity} мест, {args.requests} заявок")
+
+    if args.output:
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "mode": f"uvicorn x{args.workers}" if args.uvicorn else "asgi",
+                "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+                "capacity": args.capacity,
+                "concurrency": args.concurrency,
+            },
+            **results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 1 if results["violations"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
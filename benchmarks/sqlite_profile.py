@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Смешанная нагрузка чтение/запись на SQLite: профиль "default" против "performance".
+
+Несколько потоков в течение заданного времени читают ленту новостей и
+регистрируют студентов. Печатает операции в секунду и число ошибок
+"database is locked" для каждого профиля.
+
+    python benchmarks/sqlite_profile.py --threads 16 --seconds 5 --write-ratio 0.2
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models
+from app.database import Base, RoutingSession, create_sqlite_engines
+
+
+def make_session_factory(url, profile):
+    writer, reader = create_sqlite_engines(url, profile=profile)
+    Base.metadata.create_all(bind=writer)
+    factory = sessionmaker(bind=writer, class_=RoutingSession,
+                           read_bind=reader if reader is not writer else None)
+    return factory, writer, reader
+
+
+def seed(session_factory, news_count):
+    db = session_factory()
+    db.add_all(models.News(title=f"Новость {i}", content="Текст " * 50) for i in range(news_count))
+    db.commit()
+    db.close()
+
+
+def run_profile(profile, threads, seconds, write_ratio):
+    url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), f"{profile}.db")
+    session_factory, writer, reader = make_session_factory(url, profile)
+    seed(session_factory, 200)
+
+    counter = itertools.count()
+    stats = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(seed_value):
+        rnd = random.Random(seed_value)
+        while time.perf_counter() < deadline:
+            db = session_factory()
+            try:
+                if rnd.random() < write_ratio:
+                    n = next(counter)
+                    db.add(models.Student(name=f"Студент {n}", email=f"student{n}@example.com"))
+                    db.commit()
+                    kind = "writes"
+                else:
+                    crud.get_news(db, limit=20)
+                    kind = "reads"
+            except OperationalError as e:
+                db.rollback()
+                if "locked" not in str(e):
+                    raise
+                kind = "locked"
+            finally:
+                db.close()
+            with lock:
+                stats[kind] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    writer.dispose()
+    reader.dispose()
+    return {name: value / elapsed for name, value in stats.items()}, stats["locked"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"{'profile':<14}{'reads/s':>10}{'writes/s':>10}{'total/s':>10}{'locked':>8}")
+    for profile in ("default", "performance"):
+        rates, locked = run_profile(profile, args.threads, args.seconds, args.write_ratio)
+        total = rates["reads"] + rates["writes"]
+        print(f"{profile:<14}{rates['reads']:>10.0f}{rates['writes']:>10.0f}{total:>10.0f}{locked:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Время холодного старта воркера: импорт app.main, lifespan и первые ответы.
+
+Запускает N процессов одновременно, как uvicorn --workers N, и каждый сообщает:
+сколько занял импорт приложения, запуск lifespan (прогрев шаблонов), первый
+GET / и первый POST /token (bcrypt и python-jose загружаются только здесь).
+
+    python benchmarks/startup.py --workers 4 --runs 3 --output startup.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+
+def worker():
+    started = time.perf_counter()
+    from app.main import app
+    imported = time.perf_counter()
+
+    import httpx
+
+    async def serve():
+        timings = {}
+        async with app.router.lifespan_context(app):
+            timings["lifespan_ms"] = 1000 * (time.perf_counter() - imported)
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+                for name, method, path, kwargs in (
+                    ("first_page_ms", "GET", "/", {}),
+                    ("first_token_ms", "POST", "/token",
+                     {"data": {"username": "admin@dancestudio.ru", "password": "admin123"}}),
+                ):
+                    request_started = time.perf_counter()
+                    response = await client.request(method, path, **kwargs)
+                    response.raise_for_status()
+                    timings[name] = 1000 * (time.perf_counter() - request_started)
+        return timings
+
+    timings = {"import_ms": 1000 * (imported - started)}
+    timings.update(asyncio.run(serve()))
+    timings["ready_ms"] = 1000 * (time.perf_counter() - started)
+    print(json.dumps(timings))
+
+
+def run_workers(count):
+    started = time.perf_counter()
+    processes = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "--worker"],
+                         stdout=subprocess.PIPE, env=os.environ.copy(), text=True)
+        for _ in range(count)
+    ]
+    results = []
+    for process in processes:
+        output, _ = process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"воркер завершился с кодом {process.returncode}")
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    # Время процесса целиком: с запуском интерпретатора
+    wall = 1000 * (time.perf_counter() - started)
+    return results, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4, help="одновременно стартующих процессов")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", help="сохранить результаты в JSON")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker()
+        return
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "startup.db")
+        # Схема и данные готовятся заранее, как в продакшене перед запуском воркеров
+        import init_db
+        init_db.init_db()
+
+    columns = ("import_ms", "lifespan_ms", "first_page_ms", "first_token_ms", "ready_ms")
+    print(f"{'run':<5}{'worker':<8}" + "".join(f"{name:>16}" for name in columns))
+    runs = []
+    for run in range(1, args.runs + 1):
+        results, wall = run_workers(args.workers)
+        runs.append({"workers": results, "wall_ms": wall})
+        for number, result in enumerate(results, 1):
+            print(f"{run:<5}{number:<8}" + "".join(f"{result[name]:>16.1f}" for name in columns))
+
+    all_results = [result for run in runs for result in run["workers"]]
+    print(f"{'median':<13}" + "".join(
+        f"{statistics.median(result[name] for result in all_results):>16.1f}" for name in columns
+    ))
+    print(f"Все {args.workers} воркера готовы за {statistics.median(run['wall_ms'] for run in runs):.0f} мс (медиана)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"workers": args.workers, "runs": runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Сборка статики: имена с хешем содержимого, готовые .gz и .br, манифест для шаблонов.
+
+    python build_static.py
+
+Результат — app/static/dist/. Шаблоны получают ссылки через static_url("style.css"),
+без сборки ссылки ведут на исходные файлы.
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+import brotli
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.static_assets import BUILD_DIR, MANIFEST_PATH, STATIC_DIR
+
+# Уже сжатые форматы повторно не сжимаем
+COMPRESSIBLE = {".css", ".js", ".svg", ".html", ".json", ".txt", ".map", ".xml"}
+# Сжатые версии меньше этого размера не дают выигрыша
+MIN_COMPRESS_SIZE = 256
+
+
+def source_files(static_dir=STATIC_DIR):
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != os.path.join(static_dir, BUILD_DIR))
+        for name in sorted(files):
+            yield os.path.relpath(os.path.join(root, name), static_dir)
+
+
+def build_static(static_dir=STATIC_DIR):
+    build_dir = os.path.join(static_dir, BUILD_DIR)
+    shutil.rmtree(build_dir, ignore_errors=True)
+    manifest = {}
+
+    for rel_path in source_files(static_dir):
+        with open(os.path.join(static_dir, rel_path), "rb") as f:
+            content = f.read()
+        stem, ext = os.path.splitext(rel_path)
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        hashed = os.path.join(BUILD_DIR, f"{stem}.{digest}{ext}")
+        target = os.path.join(static_dir, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(content)
+
+        sizes = [str(len(content))]
+        if ext.lower() in COMPRESSIBLE and len(content) >= MIN_COMPRESS_SIZE:
+            # mtime=0: одинаковый вход дает побайтно одинаковый .gz
+            compressed = {
+                ".gz": gzip.compress(content, compresslevel=9, mtime=0),
+                ".br": brotli.compress(content, quality=11),
+            }
+            for suffix, data in compressed.items():
+                if len(data) < len(content):
+                    with open(target + suffix, "wb") as f:
+                        f.write(data)
+                    sizes.append(f"{suffix[1:]} {len(data)}")
+
+        manifest[rel_path.replace(os.sep, "/")] = hashed.replace(os.sep, "/")
+        print(f"{rel_path} -> {hashed} ({', '.join(sizes)} байт)")
+
+    with open(os.path.join(build_dir, os.path.basename(MANIFEST_PATH)), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+if __name__ == "__main__":
+    build_static()
+    print("Статика собрана!")
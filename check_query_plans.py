@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Проверяет, что запросы из crud.py используют вторичные индексы.
+
+Вызывает функции crud, перехватывает выполненный SQL и прогоняет его через
+EXPLAIN QUERY PLAN (SQLite) или EXPLAIN (Postgres). Схема берется из миграций.
+
+    DATABASE_URL=sqlite:///./dance_school.db python check_query_plans.py
+"""
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "plans.db")
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+from app import crud, models
+from app.database import SessionLocal, engine
+from create_tables import create_tables
+
+# (описание, вызов crud, индекс, который должен попасть в план)
+CHECKS = [
+    ("crud.get_news", lambda db: crud.get_news(db), "ix_news_is_published_created_at"),
+    ("crud.get_dance_classes", lambda db: crud.get_dance_classes.__wrapped__(db), "ix_dance_classes_is_active"),
+    ("crud.get_teachers", lambda db: crud.get_teachers.__wrapped__(db), "ix_teachers_is_active"),
+    ("crud.get_class_schedule", lambda db: crud.get_class_schedule(db, 1), "ix_schedule_dance_class_id"),
+    ("schedule by teacher", lambda db: db.query(models.Schedule).filter(models.Schedule.teacher_id == 1).all(),
+     "ix_schedule_teacher_id"),
+    ("crud.get_registrations_by_student", lambda db: crud.get_registrations_by_student(db, 1),
+     "ix_registrations_student_id"),
+    ("registrations by class",
+     lambda db: db.query(models.Registration).filter(models.Registration.dance_class_id == 1).all(),
+     "ix_registrations_dance_class_id"),
+]
+
+
+def capture_statement(db, call):
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    # Слушаем все движки: чтения идут через пул читателей, а не через engine
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        call(db)
+    finally:
+        event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+    # Основной запрос — первый SELECT: после него идут selectinload связей (news -> users),
+    # а до него может быть BEGIN
+    return next(item for item in captured if item[0].lstrip().upper().startswith("SELECT"))
+
+
+def explain(db, statement, parameters):
+    connection = db.connection()
+    if engine.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+        return "\n".join(row[-1] for row in rows)
+    # На маленьких таблицах Postgres предпочтет seq scan; проверяем, что индекс применим
+    connection.execute(text("SET LOCAL enable_seqscan = off"))
+    rows = connection.exec_driver_sql("EXPLAIN " + statement, parameters)
+    return "\n".join(row[0] for row in rows)
+
+
+def main():
+    create_tables()
+    db = SessionLocal()
+    failures = 0
+    try:
+        for name, call, index in CHECKS:
+            statement, parameters = capture_statement(db, call)
+            plan = explain(db, statement, parameters)
+            ok = index in plan
+            failures += not ok
+            print(f"[{'OK' if ok else 'FAIL'}] {name}: {index}")
+            if not ok:
+                print("    " + plan.replace("\n", "\n    "))
+    finally:
+        db.rollback()
+        db.close()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,12 @@
 #!/usr/bin/env python3
+"""Создание и обновление схемы БД миграциями Alembic.
+
+Приложение само схему не создает: команда запускается один раз перед стартом
+воркеров, чтобы они не гонялись друг с другом за DDL.
+
+    python create_tables.py            # до последней миграции
+    python create_tables.py 0002       # до конкретной ревизии
+"""
 import os
 import sys
 from dotenv import load_dotenv
@@ -8,13 +16,16 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 load_dotenv()
 
-from app.database import engine, Base
-from app import models
+from alembic import command
+from alembic.config import Config
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+
 
-def create_tables():
-    print("Создание таблиц базы данных...")
-    Base.metadata.create_all(bind=engine)
+def create_tables(revision="head"):
+    print("Применение миграций базы данных...")
+    command.upgrade(Config(ALEMBIC_INI), revision)
     print("Таблицы успешно созданы!")
 
 if __name__ == "__main__":
-    create_tables()
\ No newline at end of file
+    create_tables(sys.argv[1] if len(sys.argv) > 1 else "head")
@@ -1,20 +1,24 @@
-from sqlalchemy.orm import Session
-from app.database import SessionLocal, engine
-from app import models
-from passlib.context import CryptContext
-from datetime import time
+import argparse
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+from datetime import time as dtime
 
-# Создаем экземпляр CryptContext для хеширования паролей
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from sqlalchemy import func, insert, select
+from app.database import SessionLocal, engine
+from app import enrollment, models
+from app.passwords import hash_password
+from create_tables import create_tables
 
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return hash_password(password)
 
 
 def init_db():
-    # Создаем таблицы
-    models.Base.metadata.create_all(bind=engine)
+    # Схема — только миграциями: create_all оставил бы БД без версии alembic
+    create_tables()
 
     db = SessionLocal()
 
@@ -36,7 +40,8 @@ def init_db():
                 level="Начинающий",
                 duration=60,
                 price=1500,
-                image_url="/static/images/ballroom.jpg"
+                image_url="/static/images/ballroom.jpg",
+                capacity=16
             ),
             models.DanceClass(
                 name="Хип-хоп",
@@ -44,7 +49,8 @@ def init_db():
                 level="Средний",
                 duration=90,
                 price=2000,
-                image_url="/static/images/hiphop.jpg"
+                image_url="/static/images/hiphop.jpg",
+                capacity=20
             ),
             models.DanceClass(
                 name="Балет",
@@ -52,7 +58,8 @@ def init_db():
                 level="Продвинутый",
                 duration=120,
                 price=2500,
-                image_url="/static/images/ballet.jpg"
+                image_url="/static/images/ballet.jpg",
+                capacity=12
             ),
             models.DanceClass(
                 name="Сальса",
@@ -60,7 +67,8 @@ def init_db():
                 level="Начинающий",
                 duration=60,
                 price=1700,
-                image_url="/static/images/salsa.jpg"
+                image_url="/static/images/salsa.jpg",
+                capacity=20
             ),
             models.DanceClass(
                 name="Танго",
@@ -68,7 +76,8 @@ def init_db():
                 level="Средний",
                 duration=75,
                 price=2200,
-                image_url="/static/images/tango.jpg"
+                image_url="/static/images/tango.jpg",
+                capacity=14
             ),
             models.DanceClass(
                 name="Contemporary",
@@ -76,7 +85,8 @@ def init_db():
                 level="Продвинутый",
                 duration=90,
                 price=2300,
-                image_url="/static/images/contemporary.jpg"
+                image_url="/static/images/contemporary.jpg",
+                capacity=16
             )
         ]
 
@@ -128,58 +138,58 @@ def init_db():
         # Добавляем расписание
         schedule = [
             # Понедельник
-            models.Schedule(dance_class_id=1, teacher_id=2, day_of_week="Понедельник", start_time="18:00",
-                            end_time="19:00", room="Зал 1"),
-            models.Schedule(dance_class_id=4, teacher_id=4, day_of_week="Понедельник", start_time="19:00",
-                            end_time="20:00", room="Зал 2"),
-            models.Schedule(dance_class_id=2, teacher_id=3, day_of_week="Понедельник", start_time="20:00",
-                            end_time="21:30", room="Зал 1"),
+            models.Schedule(dance_class_id=1, teacher_id=2, day_of_week="Понедельник", start_time=dtime(18, 0),
+                            end_time=dtime(19, 0), room="Зал 1"),
+            models.Schedule(dance_class_id=4, teacher_id=4, day_of_week="Понедельник", start_time=dtime(19, 0),
+                            end_time=dtime(20, 0), room="Зал 2"),
+            models.Schedule(dance_class_id=2, teacher_id=3, day_of_week="Понедельник", start_time=dtime(20, 0),
+                            end_time=dtime(21, 30), room="Зал 1"),
 
             # Вторник
-            models.Schedule(dance_class_id=3, teacher_id=1, day_of_week="Вторник", start_time="17:00", end_time="19:00",
+            models.Schedule(dance_class_id=3, teacher_id=1, day_of_week="Вторник", start_time=dtime(17, 0), end_time=dtime(19, 0),
                             room="Зал 1"),
-            models.Schedule(dance_class_id=5, teacher_id=5, day_of_week="Вторник", start_time="19:00", end_time="20:15",
+            models.Schedule(dance_class_id=5, teacher_id=5, day_of_week="Вторник", start_time=dtime(19, 0), end_time=dtime(20, 15),
                             room="Зал 2"),
-            models.Schedule(dance_class_id=6, teacher_id=1, day_of_week="Вторник", start_time="20:30", end_time="22:00",
+            models.Schedule(dance_class_id=6, teacher_id=1, day_of_week="Вторник", start_time=dtime(20, 30), end_time=dtime(22, 0),
                             room="Зал 1"),
 
             # Среда
-            models.Schedule(dance_class_id=1, teacher_id=2, day_of_week="Среда", start_time="18:00", end_time="19:00",
+            models.Schedule(dance_class_id=1, teacher_id=2, day_of_week="Среда", start_time=dtime(18, 0), end_time=dtime(19, 0),
                             room="Зал 1"),
-            models.Schedule(dance_class_id=4, teacher_id=4, day_of_week="Среда", start_time="19:00", end_time="20:00",
+            models.Schedule(dance_class_id=4, teacher_id=4, day_of_week="Среда", start_time=dtime(19, 0), end_time=dtime(20, 0),
                             room="Зал 2"),
-            models.Schedule(dance_class_id=2, teacher_id=3, day_of_week="Среда", start_time="20:00", end_time="21:30",
+            models.Schedule(dance_class_id=2, teacher_id=3, day_of_week="Среда", start_time=dtime(20, 0), end_time=dtime(21, 30),
                             room="Зал 1"),
 
             # Четверг
-            models.Schedule(dance_class_id=3, teacher_id=1, day_of_week="Четверг", start_time="17:00", end_time="19:00",
+            models.Schedule(dance_class_id=3, teacher_id=1, day_of_week="Четверг", start_time=dtime(17, 0), end_time=dtime(19, 0),
                             room="Зал 1"),
-            models.Schedule(dance_class_id=5, teacher_id=5, day_of_week="Четверг", start_time="19:00", end_time="20:15",
+            models.Schedule(dance_class_id=5, teacher_id=5, day_of_week="Четверг", start_time=dtime(19, 0), end_time=dtime(20, 15),
                             room="Зал 2"),
-            models.Schedule(dance_class_id=6, teacher_id=1, day_of_week="Четверг", start_time="20:30", end_time="22:00",
+            models.Schedule(dance_class_id=6, teacher_id=1, day_of_week="Четверг", start_time=dtime(20, 30), end_time=dtime(22, 0),
                             room="Зал 1"),
 
             # Пятница
-            models.Schedule(dance_class_id=1, teacher_id=2, day_of_week="Пятница", start_time="18:00", end_time="19:00",
+            models.Schedule(dance_class_id=1, teacher_id=2, day_of_week="Пятница", start_time=dtime(18, 0), end_time=dtime(19, 0),
                             room="Зал 1"),
-            models.Schedule(dance_class_id=4, teacher_id=4, day_of_week="Пятница", start_time="19:00", end_time="20:00",
+            models.Schedule(dance_class_id=4, teacher_id=4, day_of_week="Пятница", start_time=dtime(19, 0), end_time=dtime(20, 0),
                             room="Зал 2"),
 
             # Суббота
-            models.Schedule(dance_class_id=2, teacher_id=3, day_of_week="Суббота", start_time="11:00", end_time="12:30",
+            models.Schedule(dance_class_id=2, teacher_id=3, day_of_week="Суббота", start_time=dtime(11, 0), end_time=dtime(12, 30),
                             room="Зал 1"),
-            models.Schedule(dance_class_id=3, teacher_id=1, day_of_week="Суббота", start_time="13:00", end_time="15:00",
+            models.Schedule(dance_class_id=3, teacher_id=1, day_of_week="Суббота", start_time=dtime(13, 0), end_time=dtime(15, 0),
                             room="Зал 1"),
-            models.Schedule(dance_class_id=5, teacher_id=5, day_of_week="Суббота", start_time="15:30", end_time="16:45",
+            models.Schedule(dance_class_id=5, teacher_id=5, day_of_week="Суббота", start_time=dtime(15, 30), end_time=dtime(16, 45),
                             room="Зал 2"),
-            models.Schedule(dance_class_id=6, teacher_id=1, day_of_week="Суббота", start_time="17:00", end_time="18:30",
+            models.Schedule(dance_class_id=6, teacher_id=1, day_of_week="Суббота", start_time=dtime(17, 0), end_time=dtime(18, 30),
                             room="Зал 1"),
 
             # Воскресенье
-            models.Schedule(dance_class_id=4, teacher_id=4, day_of_week="Воскресенье", start_time="12:00",
-                            end_time="13:00", room="Зал 2"),
-            models.Schedule(dance_class_id=1, teacher_id=2, day_of_week="Воскресенье", start_time="14:00",
-                            end_time="15:00", room="Зал 1")
+            models.Schedule(dance_class_id=4, teacher_id=4, day_of_week="Воскресенье", start_time=dtime(12, 0),
+                            end_time=dtime(13, 0), room="Зал 2"),
+            models.Schedule(dance_class_id=1, teacher_id=2, day_of_week="Воскресенье", start_time=dtime(14, 0),
+                            end_time=dtime(15, 0), room="Зал 1")
         ]
 
         for item in schedule:
@@ -233,5 +243,219 @@ def init_db():
         db.close()
 
 
+# Синтетические данные для нагрузочных тестов. Объемы на единицу масштаба:
+# --scale 3 дает ~1 млн строк, --scale 10 — миллион студентов и 2.5 млн заявок
+SYNTHETIC_PER_SCALE = {
+    "dance_classes": 200,
+    "teachers": 100,
+    "schedule": 2000,
+    "news": 1000,
+    "students": 100_000,
+    "registrations": 250_000,
+}
+SYNTHETIC_CHUNK_SIZE = 10_000
+# Фиксированная точка отсчета дат, чтобы одинаковый seed давал одинаковую БД
+SYNTHETIC_EPOCH = datetime(2024, 1, 1)
+
+FIRST_NAMES = ["Анна", "Мария", "Елена", "Ольга", "Дарья", "Алиса", "Софья", "Ксения",
+               "Иван", "Михаил", "Алексей", "Дмитрий", "Сергей", "Артем", "Максим", "Кирилл"]
+LAST_NAMES = ["Иванова", "Петрова", "Смирнова", "Кузнецова", "Попова", "Соколова",
+              "Лебедева", "Козлова", "Новикова", "Морозова", "Волкова", "Федорова"]
+STYLES = ["Бальные танцы", "Хип-хоп", "Балет", "Сальса", "Танго", "Contemporary",
+          "Бачата", "Джаз-фанк", "Стрип-пластика", "Вог", "Брейкинг", "Кизомба"]
+LEVELS = ["Начинающий", "Средний", "Продвинутый"]
+STATUSES = ["pending", "pending", "confirmed", "confirmed", "confirmed", "cancelled"]
+LOREM = ("Занятия проходят в просторном зале с зеркалами и хорошим звуком. "
+         "Разбираем технику, музыкальность и работу в паре. ")
+
+
+def _next_id(conn, model):
+    return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _insert_rows(conn, model, rows, chunk_size=SYNTHETIC_CHUNK_SIZE):
+    # Core executemany пачками: без ORM-объектов и без identity map
+    table = model.__table__
+    count = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            conn.execute(insert(table), chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        conn.execute(insert(table), chunk)
+        count += len(chunk)
+    return count
+
+
+def _synthetic_classes(rng, first_id, count):
+    for i in range(first_id, first_id + count):
+        yield {
+            "id": i,
+            "name": f"{rng.choice(STYLES)} #{i}",
+            "description": LOREM * rng.randint(1, 3),
+            "level": rng.choice(LEVELS),
+            "duration": rng.choice((60, 75, 90, 120)),
+            "price": float(rng.randrange(1000, 4000, 100)),
+            "image_url": "/static/images/ballroom.jpg",
+            "is_active": rng.random() > 0.1,
+            "created_at": SYNTHETIC_EPOCH,
+        }
+
+
+def _synthetic_teachers(rng, first_id, count):
+    for i in range(first_id, first_id + count):
+        yield {
+            "id": i,
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "bio": LOREM * rng.randint(1, 4),
+            "specialization": ", ".join(rng.sample(STYLES, 2)),
+            "experience": rng.randint(1, 30),
+            "photo_url": "/static/images/teacher1.jpg",
+            "is_active": rng.random() > 0.05,
+        }
+
+
+def _synthetic_schedule(rng, first_id, count, class_ids, teacher_ids):
+    # Без пересечений по залу и по преподавателю, как после проверки в админке:
+    # залы (отдельные от залов init_db) заполняются слотами подряд, преподаватель
+    # берется из свободных в это время
+    teacher_busy = {}
+    slot_id = first_id
+    for room in itertools.count(1):
+        placed = slot_id
+        for day in models.WEEK_DAYS:
+            start = 8 * 60
+            while slot_id < first_id + count:
+                start += rng.choice((0, 15, 30))
+                end = start + rng.choice((60, 75, 90, 120))
+                if end > 23 * 60 + 45:
+                    break
+                for teacher_id in rng.sample(teacher_ids, min(5, len(teacher_ids))):
+                    busy = teacher_busy.setdefault((teacher_id, day), [])
+                    if all(end <= busy_start or start >= busy_end for busy_start, busy_end in busy):
+                        busy.append((start, end))
+                        yield {
+                            "id": slot_id,
+                            "dance_class_id": rng.choice(class_ids),
+                            "teacher_id": teacher_id,
+                            "day_of_week": day,
+                            "start_time": dtime(start // 60, start % 60),
+                            "end_time": dtime(end // 60, end % 60),
+                            "room": f"Студия {room}",
+                        }
+                        slot_id += 1
+                        break
+                start = end
+        # Все преподаватели заняты или слоты закончились
+        if slot_id == placed or slot_id >= first_id + count:
+            return
+
+
+def _synthetic_news(rng, first_id, count, author_id):
+    for i in range(first_id, first_id + count):
+        yield {
+            "id": i,
+            "title": f"{rng.choice(STYLES)}: новость {i}",
+            "content": LOREM * rng.randint(2, 6),
+            "author_id": author_id,
+            "image_url": "/static/images/news1.jpg",
+            "is_published": rng.random() > 0.05,
+            "created_at": SYNTHETIC_EPOCH - timedelta(minutes=i),
+            "updated_at": SYNTHETIC_EPOCH - timedelta(minutes=i),
+        }
+
+
+def _synthetic_students(rng, first_id, count):
+    for i in range(first_id, first_id + count):
+        yield {
+            "id": i,
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "email": f"student{i}@example.com",
+            "phone": f"+7 9{rng.randrange(10 ** 9):09d}",
+            "level": rng.choice(LEVELS),
+            "created_at": SYNTHETIC_EPOCH - timedelta(seconds=rng.randrange(365 * 86400)),
+        }
+
+
+def _synthetic_registrations(rng, first_id, count, student_ids, class_ids):
+    # Пары (студент, направление) уникальны: так требует uq_registrations_student_id_dance_class_id.
+    # Студенты идут подряд, у каждого — несколько разных направлений
+    per_student = max(1, min(len(class_ids), -(-count // len(student_ids))))
+    reg_id = first_id
+    for student_id in student_ids:
+        for class_id in rng.sample(class_ids, per_student):
+            if reg_id >= first_id + count:
+                return
+            yield {
+                "id": reg_id,
+                "student_id": student_id,
+                "dance_class_id": class_id,
+                "registration_date": SYNTHETIC_EPOCH - timedelta(seconds=rng.randrange(365 * 86400)),
+                "status": rng.choice(STATUSES),
+            }
+            reg_id += 1
+
+
+def generate_synthetic(scale: float = 1.0, seed: int = 42, chunk_size: int = SYNTHETIC_CHUNK_SIZE):
+    """Добавляет синтетические данные поверх существующих. Один seed — одинаковый набор."""
+    rng = random.Random(seed)
+    sizes = {name: max(1, int(per_scale * scale)) for name, per_scale in SYNTHETIC_PER_SCALE.items()}
+    create_tables()
+    report = {}
+
+    def step(name, model, make_rows):
+        started = time.perf_counter()
+        # Каждая таблица — одна транзакция: в SQLite это в разы быстрее коммита на пачку
+        with engine.begin() as conn:
+            first_id = _next_id(conn, model)
+            count = _insert_rows(conn, model, make_rows(first_id), chunk_size)
+        report[name] = count
+        print(f"{name}: {count} строк за {time.perf_counter() - started:.1f} с")
+        return list(range(first_id, first_id + count))
+
+    with engine.connect() as conn:
+        author_id = conn.execute(
+            select(models.User.id).where(models.User.is_admin.is_(True)).order_by(models.User.id)
+        ).scalar()
+
+    class_ids = step("dance_classes", models.DanceClass,
+                     lambda first: _synthetic_classes(rng, first, sizes["dance_classes"]))
+    teacher_ids = step("teachers", models.Teacher,
+                       lambda first: _synthetic_teachers(rng, first, sizes["teachers"]))
+    step("schedule", models.Schedule,
+         lambda first: _synthetic_schedule(rng, first, sizes["schedule"], class_ids, teacher_ids))
+    step("news", models.News,
+         lambda first: _synthetic_news(rng, first, sizes["news"], author_id))
+    student_ids = step("students", models.Student,
+                       lambda first: _synthetic_students(rng, first, sizes["students"]))
+    step("registrations", models.Registration,
+         lambda first: _synthetic_registrations(rng, first, sizes["registrations"], student_ids, class_ids))
+
+    # Заявки вставлены в обход захвата мест: счетчики занятых мест считаем по ним
+    with engine.begin() as conn:
+        conn.execute(enrollment.recount_seats())
+
+    # Свежая статистика для планировщика после массовой загрузки
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    return report
+
+
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Заполнение базы тестовыми данными")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="добавить синтетический набор для нагрузочных тестов")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="масштаб синтетического набора (1 — ~350 тыс. строк)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=SYNTHETIC_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    init_db()
+    if args.synthetic:
+        started = time.perf_counter()
+        report = generate_synthetic(args.scale, args.seed, args.chunk_size)
+        print(f"Всего {sum(report.values())} строк за {time.perf_counter() - started:.1f} с")
\ No newline at end of file
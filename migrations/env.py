@@ -0,0 +1,68 @@
+import os
+from logging.config import fileConfig
+
+from alembic import context
+from dotenv import load_dotenv
+from sqlalchemy import engine_from_config, pool
+
+load_dotenv()
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+
+def get_url():
+    url = os.getenv("DATABASE_URL") or config.get_main_option("sqlalchemy.url")
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    return url
+
+
+def include_name(name, type_, parent_names):
+    # Объекты полнотекстового поиска (миграция 0004) в моделях не описаны:
+    # autogenerate не должен предлагать их удалить
+    if type_ == "table":
+        return "_fts" not in name
+    if type_ in ("column", "index"):
+        return not name.endswith("search_vector")
+    return True
+
+
+def run_migrations_offline():
+    # Генерация SQL без подключения к БД: alembic upgrade head --sql
+    context.configure(
+        url=get_url(),
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=get_url().startswith("sqlite"),
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    # Модели импортируются только здесь: офлайн-режиму не нужны драйверы БД
+    from app.database import Base
+    from app import models  # noqa: F401
+
+    configuration = config.get_section(config.config_ini_section, {})
+    configuration["sqlalchemy.url"] = get_url()
+    connectable = engine_from_config(configuration, prefix="sqlalchemy.", poolclass=pool.NullPool)
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=Base.metadata,
+            include_name=include_name,
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
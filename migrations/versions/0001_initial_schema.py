@@ -0,0 +1,138 @@
+"""initial schema
+
+Схема, которую до появления миграций создавал Base.metadata.create_all.
+На БД, уже созданной через create_all, существующие таблицы пропускаются.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _existing_tables():
+    if context.is_offline_mode():
+        return set()
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade():
+    existing = _existing_tables()
+
+    if "dance_classes" not in existing:
+        op.create_table(
+            "dance_classes",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=100), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("level", sa.String(length=50), nullable=True),
+            sa.Column("duration", sa.Integer(), nullable=True),
+            sa.Column("price", sa.Float(), nullable=True),
+            sa.Column("image_url", sa.String(length=200), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_dance_classes_id", "dance_classes", ["id"])
+
+    if "teachers" not in existing:
+        op.create_table(
+            "teachers",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=100), nullable=False),
+            sa.Column("bio", sa.Text(), nullable=True),
+            sa.Column("specialization", sa.String(length=100), nullable=True),
+            sa.Column("experience", sa.Integer(), nullable=True),
+            sa.Column("photo_url", sa.String(length=200), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_teachers_id", "teachers", ["id"])
+
+    if "schedule" not in existing:
+        op.create_table(
+            "schedule",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("dance_class_id", sa.Integer(), nullable=False),
+            sa.Column("teacher_id", sa.Integer(), nullable=False),
+            sa.Column("day_of_week", sa.String(length=20), nullable=True),
+            sa.Column("start_time", sa.String(length=10), nullable=True),
+            sa.Column("end_time", sa.String(length=10), nullable=True),
+            sa.Column("room", sa.String(length=50), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_schedule_id", "schedule", ["id"])
+
+    if "students" not in existing:
+        op.create_table(
+            "students",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=100), nullable=False),
+            sa.Column("email", sa.String(length=100), nullable=True),
+            sa.Column("phone", sa.String(length=20), nullable=True),
+            sa.Column("level", sa.String(length=50), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_students_id", "students", ["id"])
+        op.create_index("ix_students_email", "students", ["email"], unique=True)
+
+    if "registrations" not in existing:
+        op.create_table(
+            "registrations",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("student_id", sa.Integer(), nullable=False),
+            sa.Column("dance_class_id", sa.Integer(), nullable=False),
+            sa.Column("registration_date", sa.DateTime(), nullable=True),
+            sa.Column("status", sa.String(length=20), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_registrations_id", "registrations", ["id"])
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("email", sa.String(length=100), nullable=False),
+            sa.Column("hashed_password", sa.String(length=200), nullable=False),
+            sa.Column("full_name", sa.String(length=100), nullable=True),
+            sa.Column("is_admin", sa.Boolean(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if "news" not in existing:
+        op.create_table(
+            "news",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("title", sa.String(length=200), nullable=False),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("author_id", sa.Integer(), nullable=True),
+            sa.Column("image_url", sa.String(length=200), nullable=True),
+            sa.Column("is_published", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["author_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_news_id", "news", ["id"])
+
+
+def downgrade():
+    op.drop_table("news")
+    op.drop_table("users")
+    op.drop_table("registrations")
+    op.drop_table("students")
+    op.drop_table("schedule")
+    op.drop_table("teachers")
+    op.drop_table("dance_classes")
@@ -0,0 +1,44 @@
+"""secondary indexes on filter and sort columns
+
+Индексы под фильтры и сортировки из crud.py.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_schedule_dance_class_id", "schedule", ["dance_class_id"]),
+    ("ix_schedule_teacher_id", "schedule", ["teacher_id"]),
+    ("ix_registrations_student_id", "registrations", ["student_id"]),
+    ("ix_registrations_dance_class_id", "registrations", ["dance_class_id"]),
+    ("ix_news_is_published_created_at", "news", ["is_published", "created_at"]),
+    ("ix_dance_classes_is_active", "dance_classes", ["is_active"]),
+    ("ix_teachers_is_active", "teachers", ["is_active"]),
+]
+
+
+def _existing_indexes(table):
+    if context.is_offline_mode():
+        return set()
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        # БД, созданная create_all по текущим моделям, уже содержит эти индексы
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,60 @@
+"""unique registration per student and class
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+import logging
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# Из дублей остается заявка с самым продвинутым статусом, при равенстве — самая ранняя
+DELETE_DUPLICATES = """
+DELETE FROM registrations WHERE id NOT IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY student_id, dance_class_id
+            ORDER BY CASE status WHEN 'confirmed' THEN 0 WHEN 'pending' THEN 1 ELSE 2 END, id
+        ) AS rank
+        FROM registrations
+    ) ranked WHERE rank = 1
+)
+"""
+
+
+def _existing_indexes(table):
+    if context.is_offline_mode():
+        return set()
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    # БД, созданная create_all по текущим моделям, уже содержит этот индекс
+    if "uq_registrations_student_id_dance_class_id" in _existing_indexes("registrations"):
+        return
+    # Убираем уже накопившиеся дубли
+    if context.is_offline_mode():
+        op.execute(DELETE_DUPLICATES)
+    else:
+        removed = op.get_bind().execute(sa.text(DELETE_DUPLICATES)).rowcount
+        if removed:
+            logger.warning("Removed %d duplicate registrations", removed)
+    op.create_index(
+        "uq_registrations_student_id_dance_class_id",
+        "registrations",
+        ["student_id", "dance_class_id"],
+        unique=True,
+    )
+
+
+def downgrade():
+    op.drop_index("uq_registrations_student_id_dance_class_id", table_name="registrations")
@@ -0,0 +1,92 @@
+"""full-text search over news, classes and teachers
+
+SQLite: FTS5-таблицы (external content) и триггеры синхронизации.
+Postgres: генерируемый столбец search_vector (конфигурация russian) и GIN-индекс.
+На БД, созданной через create_all, все уже есть: операции идемпотентны.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import context, op
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# (таблица, индексируемые столбцы — первый заголовок, признак видимости, веса bm25)
+SOURCES = (
+    ("news", ("title", "content"), "is_published", "10.0, 1.0"),
+    ("dance_classes", ("name", "description", "level"), "is_active", "10.0, 1.0, 2.0"),
+    ("teachers", ("name", "specialization", "bio"), "is_active", "10.0, 5.0, 1.0"),
+)
+
+
+def _fold(expression):
+    return f"replace(replace({expression}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def _upgrade_sqlite(table, columns, visible, weights):
+    fts = f"{table}_fts"
+    names = ", ".join(columns)
+    new = ", ".join(_fold(f"new.{column}") for column in columns)
+    old = ", ".join(_fold(f"old.{column}") for column in columns)
+    values = ", ".join(_fold(column) for column in columns)
+    op.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, "
+        f"content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')"
+    )
+    op.execute(f"INSERT INTO {fts}({fts}, rank) VALUES ('rank', 'bm25({weights})')")
+    op.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} WHEN new.{visible} BEGIN "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END"
+    )
+    op.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} WHEN old.{visible} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); END"
+    )
+    op.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names}, {visible} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) SELECT 'delete', old.id, {old} WHERE old.{visible}; "
+        f"INSERT INTO {fts}(rowid, {names}) SELECT new.id, {new} WHERE new.{visible}; END"
+    )
+    # Индексируем уже существующие записи
+    op.execute(f"INSERT INTO {fts}({fts}) VALUES ('delete-all')")
+    op.execute(f"INSERT INTO {fts}(rowid, {names}) SELECT id, {values} FROM {table} WHERE {visible}")
+
+
+def _upgrade_postgresql(table, columns, visible, weights):
+    vector = " || ".join(
+        f"setweight(to_tsvector('russian', coalesce({column}, '')), '{weight}')"
+        for column, weight in zip(columns, "ABC")
+    )
+    # Генерируемый столбец заполняется сразу для всех строк (Postgres 12+)
+    op.execute(
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({vector}) STORED"
+    )
+    op.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING gin (search_vector)")
+
+
+def upgrade():
+    dialect = context.get_context().dialect.name
+    for source in SOURCES:
+        if dialect == "sqlite":
+            _upgrade_sqlite(*source)
+        elif dialect == "postgresql":
+            _upgrade_postgresql(*source)
+
+
+def downgrade():
+    dialect = context.get_context().dialect.name
+    for table, _, _, _ in SOURCES:
+        if dialect == "sqlite":
+            for suffix in ("ai", "ad", "au"):
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {table}_fts")
+        elif dialect == "postgresql":
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_search_vector")
+            op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,192 @@
+"""typed schedule times and interval indexes
+
+Время занятий из произвольных строк ("9:00", "18.00", "18:00:00") приводится к
+"ЧЧ:ММ" и переводится в тип TIME; нераспознанные значения становятся NULL.
+Дни недели приводятся к написанию из models.WEEK_DAYS. Индексы (зал, день, начало)
+и (преподаватель, день, начало) нужны для проверки пересечений при записи.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+import re
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+WEEK_DAYS = ["Понедельник", "Вторник", "Среда", "Четверг", "Пятница", "Суббота", "Воскресенье"]
+_TIME = re.compile(r"^\s*(\d{1,2})\s*[:.]\s*(\d{2})(?:\s*:\s*\d{2})?\s*$")
+
+
+def _normalize_time(value):
+    match = _TIME.match(value or "")
+    if match is None:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2))
+    if hour > 23 or minute > 59:
+        return None
+    return f"{hour:02d}:{minute:02d}"
+
+
+def _normalize_day(value):
+    day = (value or "").strip().capitalize()
+    return day if day in WEEK_DAYS else value
+
+
+schedule = sa.table(
+    "schedule",
+    sa.column("id", sa.Integer),
+    sa.column("day_of_week", sa.String),
+    sa.column("start_time", sa.String),
+    sa.column("end_time", sa.String),
+)
+
+
+def _normalize_rows():
+    bind = op.get_bind()
+    rows = []
+    for row in bind.execute(sa.select(schedule)).fetchall():
+        rows.append({
+            "row_id": row.id,
+            "day_of_week": _normalize_day(row.day_of_week),
+            "start_time": _normalize_time(row.start_time),
+            "end_time": _normalize_time(row.end_time),
+        })
+    _write_rows(rows)
+    return rows
+
+
+def _sqlite_time_sql(column):
+    """Правило _normalize_time в виде SQL: офлайн на SQLite данных в Python нет.
+
+    Ожидает значение без пробелов и с ":" вместо "." (см. upgrade).
+    """
+    one_digit = " OR ".join(
+        f"{column} GLOB '[0-9]:[0-5][0-9]{seconds}'" for seconds in ("", ":[0-9][0-9]")
+    )
+    two_digits = " OR ".join(
+        f"{column} GLOB '{hour}:[0-5][0-9]{seconds}'"
+        for hour in ("[01][0-9]", "2[0-3]") for seconds in ("", ":[0-9][0-9]")
+    )
+    return (f"CASE WHEN {one_digit} THEN '0' || substr({column}, 1, 4) "
+            f"WHEN {two_digits} THEN substr({column}, 1, 5) END")
+
+
+def _sqlite_day_sql(column):
+    # lower/upper в SQLite без ICU кириллицу не меняют: перечисляем варианты написания
+    variants = " ".join(
+        f"WHEN '{variant}' THEN '{day}'"
+        for day in WEEK_DAYS for variant in sorted({day, day.lower(), day.upper()})
+    )
+    return f"CASE trim({column}) {variants} ELSE {column} END"
+
+
+def _schedule_table(time_type, *indexes):
+    """Полное описание таблицы для batch на SQLite: с copy_from batch не отражает
+    живую таблицу, поэтому работает и офлайн (alembic upgrade head --sql)."""
+    table = sa.Table(
+        "schedule",
+        sa.MetaData(),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("dance_class_id", sa.Integer(), nullable=False),
+        sa.Column("teacher_id", sa.Integer(), nullable=False),
+        sa.Column("day_of_week", sa.String(length=20), nullable=True),
+        sa.Column("start_time", time_type, nullable=True),
+        sa.Column("end_time", time_type, nullable=True),
+        sa.Column("room", sa.String(length=50), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    for name, columns in (
+        ("ix_schedule_id", ["id"]),
+        ("ix_schedule_dance_class_id", ["dance_class_id"]),
+        ("ix_schedule_teacher_id", ["teacher_id"]),
+    ) + indexes:
+        sa.Index(name, *(table.c[column] for column in columns))
+    return table
+
+
+INTERVAL_INDEXES = (
+    ("ix_schedule_room_day_of_week_start_time", ["room", "day_of_week", "start_time"]),
+    ("ix_schedule_teacher_id_day_of_week_start_time", ["teacher_id", "day_of_week", "start_time"]),
+)
+
+
+def _existing_indexes():
+    # SQLite пересоздает таблицу по copy_from, где интервальных индексов нет: там создаем всегда.
+    # На Postgres БД, созданная create_all по текущим моделям, уже содержит их
+    if context.is_offline_mode() or op.get_bind().dialect.name == "sqlite":
+        return set()
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("schedule")}
+
+
+def _write_rows(rows):
+    if rows:
+        op.get_bind().execute(
+            schedule.update().where(schedule.c.id == sa.bindparam("row_id")).values(
+                day_of_week=sa.bindparam("day_of_week"),
+                start_time=sa.bindparam("start_time"),
+                end_time=sa.bindparam("end_time"),
+            ),
+            rows,
+        )
+
+
+def upgrade():
+    # Офлайн (--sql) данных нет. На Postgres генерируется только смена типа,
+    # на SQLite — нормализация в SQL с сохранением времени во временную таблицу
+    offline_sqlite = context.is_offline_mode() and op.get_context().dialect.name == "sqlite"
+    rows = None if context.is_offline_mode() else _normalize_rows()
+    existing = _existing_indexes()
+    if offline_sqlite:
+        op.execute(
+            "CREATE TEMP TABLE _schedule_times AS SELECT id, "
+            f"{_sqlite_time_sql('start_time')} AS start_time, "
+            f"{_sqlite_time_sql('end_time')} AS end_time FROM ("
+            "SELECT id, replace(replace(start_time, ' ', ''), '.', ':') AS start_time, "
+            "replace(replace(end_time, ' ', ''), '.', ':') AS end_time FROM schedule)"
+        )
+        op.execute(f"UPDATE schedule SET day_of_week = {_sqlite_day_sql('day_of_week')}")
+
+    with op.batch_alter_table("schedule", copy_from=_schedule_table(sa.String(length=10))) as batch_op:
+        for column in ("start_time", "end_time"):
+            batch_op.alter_column(
+                column,
+                existing_type=sa.String(length=10),
+                type_=sa.Time(),
+                postgresql_using=f"{column}::time",
+            )
+        for name, columns in INTERVAL_INDEXES:
+            if name not in existing:
+                batch_op.create_index(name, columns)
+
+    # SQLite при пересоздании таблицы копирует значения через CAST(... AS TIME), то есть
+    # в число ("18:00" -> 18). Возвращаем строки "ЧЧ:ММ": в этом формате их читает
+    # models.ScheduleTime, а столбец TIME сохраняет такие строки как текст
+    if rows is not None and op.get_bind().dialect.name == "sqlite":
+        _write_rows(rows)
+    elif offline_sqlite:
+        op.execute(
+            "UPDATE schedule SET "
+            "start_time = (SELECT t.start_time FROM _schedule_times t WHERE t.id = schedule.id), "
+            "end_time = (SELECT t.end_time FROM _schedule_times t WHERE t.id = schedule.id)"
+        )
+        op.execute("DROP TABLE _schedule_times")
+
+
+def downgrade():
+    with op.batch_alter_table("schedule", copy_from=_schedule_table(sa.Time(), *INTERVAL_INDEXES)) as batch_op:
+        for name, _ in reversed(INTERVAL_INDEXES):
+            batch_op.drop_index(name)
+        for column in ("start_time", "end_time"):
+            batch_op.alter_column(
+                column,
+                existing_type=sa.Time(),
+                type_=sa.String(length=10),
+                postgresql_using=f"to_char({column}, 'HH24:MI')",
+            )
@@ -0,0 +1,59 @@
+"""class capacity, seat counter and waitlist index
+
+capacity — число мест на направлении (NULL — без ограничения), seats_taken —
+счетчик занятых мест, который атомарно меняет app.enrollment. Счетчик
+заполняется по уже существующим заявкам в статусах pending и confirmed.
+Индекс (направление, статус, id) отдает голову листа ожидания без сортировки.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def _existing(table):
+    """(столбцы, индексы) таблицы; БД, созданная create_all по текущим моделям, уже содержит новые."""
+    if context.is_offline_mode():
+        return set(), set()
+    inspector = sa.inspect(op.get_bind())
+    return ({column["name"] for column in inspector.get_columns(table)},
+            {index["name"] for index in inspector.get_indexes(table)})
+
+
+def upgrade():
+    columns, _ = _existing("dance_classes")
+    # ADD COLUMN с константным DEFAULT SQLite выполняет без пересоздания таблицы
+    if "capacity" not in columns:
+        op.add_column("dance_classes", sa.Column("capacity", sa.Integer(), nullable=True))
+    if "seats_taken" not in columns:
+        op.add_column(
+            "dance_classes",
+            sa.Column("seats_taken", sa.Integer(), nullable=False, server_default="0"),
+        )
+    _, indexes = _existing("registrations")
+    if "ix_registrations_dance_class_id_status_id" not in indexes:
+        op.create_index(
+            "ix_registrations_dance_class_id_status_id", "registrations", ["dance_class_id", "status", "id"]
+        )
+    op.execute(
+        "UPDATE dance_classes SET seats_taken = ("
+        "SELECT count(*) FROM registrations "
+        "WHERE registrations.dance_class_id = dance_classes.id "
+        "AND registrations.status IN ('pending', 'confirmed'))"
+    )
+
+
+def downgrade():
+    op.drop_index("ix_registrations_dance_class_id_status_id", table_name="registrations")
+    # Без batch: пересоздание таблицы удалило бы триггеры поиска (0004), а SQLite 3.35+
+    # удаляет неиндексированные столбцы сам — и офлайн (--sql) тоже
+    op.drop_column("dance_classes", "seats_taken")
+    op.drop_column("dance_classes", "capacity")
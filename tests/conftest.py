@@ -0,0 +1,91 @@
+"""Общие фикстуры: приложение на временной SQLite, созданной миграциями (init_db)."""
+import itertools
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+# Настройки читаются при импорте app: задаем их до него
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+ADMIN_EMAIL = "admin@dancestudio.ru"
+ADMIN_PASSWORD = "admin123"
+
+_unique = itertools.count()
+
+
+@pytest.fixture(scope="session")
+def client():
+    import init_db
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    init_db.init_db()
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    response = client.post("/token", data={"username": ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": "Bearer " + response.json()["access_token"]}
+
+
+@pytest.fixture
+def db(client):
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_student(db):
+    """Создает студента с уникальным email и возвращает его id."""
+    from app import models
+
+    def make():
+        student = models.Student(name="Тест", email=f"test-{next(_unique)}@example.com")
+        db.add(student)
+        db.commit()
+        return student.id
+
+    return make
+
+
+@pytest.fixture
+def make_class(db):
+    """Создает направление с заданным числом мест и возвращает его id."""
+    from app import models
+
+    def make(capacity=None):
+        dance_class = models.DanceClass(name=f"Тестовое направление {next(_unique)}", capacity=capacity)
+        db.add(dance_class)
+        db.commit()
+        return dance_class.id
+
+    return make
+
+
+@pytest.fixture
+def make_teacher(db):
+    """Создает преподавателя без занятий и возвращает его id."""
+    from app import models
+
+    def make():
+        teacher = models.Teacher(name=f"Тестовый преподаватель {next(_unique)}")
+        db.add(teacher)
+        db.commit()
+        return teacher.id
+
+    return make
@@ -0,0 +1,54 @@
+from app import crud, models
+
+
+def _statuses(db, class_id):
+    return [row.status for row in db.query(models.Registration)
+            .filter(models.Registration.dance_class_id == class_id)
+            .order_by(models.Registration.id)]
+
+
+def test_import_registrations_reports_duplicates(db, make_student, make_class):
+    class_id = make_class()
+    registered, first, second = make_student(), make_student(), make_student()
+    db.add(models.Registration(student_id=registered, dance_class_id=class_id))
+    db.commit()
+
+    rows = [
+        {"student_id": registered, "dance_class_id": class_id},  # уже записан
+        {"student_id": first, "dance_class_id": class_id},
+        {"student_id": first, "dance_class_id": class_id},       # повтор в файле
+        {"student_id": second, "dance_class_id": class_id},      # повтор в следующей пачке
+        {"student_id": second, "dance_class_id": class_id},
+    ]
+    report = crud.import_registrations(db, rows, chunk_size=4)
+
+    assert report["inserted"] == 2
+    assert report["skipped"] == 3
+    assert [error["row"] for error in report["errors"]] == [1, 3, 5]
+    assert report["errors"][0]["errors"] == [{"field": "dance_class_id", "message": "Already registered"}]
+    assert len(_statuses(db, class_id)) == 3
+
+
+def test_import_registrations_endpoint_returns_report(client, admin_headers, make_student, make_class):
+    class_id, student_id = make_class(), make_student()
+    rows = [{"student_id": student_id, "dance_class_id": class_id}] * 2
+
+    response = client.post("/api/admin/import/registrations", json=rows, headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 1
+    assert response.json()["skipped"] == 1
+
+
+def test_import_registrations_waitlists_rows_over_capacity(db, make_student, make_class):
+    class_id = make_class(capacity=2)
+    crud.import_registrations(db, [{"student_id": make_student(), "dance_class_id": class_id}])
+    rows = [{"student_id": make_student(), "dance_class_id": class_id} for _ in range(3)]
+
+    report = crud.import_registrations(db, rows, chunk_size=2)
+
+    assert report["inserted"] == 3
+    assert report["waitlisted"] == 2
+    assert _statuses(db, class_id) == ["pending", "pending", "waitlisted", "waitlisted"]
+    db.rollback()
+    assert db.get(models.DanceClass, class_id).seats_taken == 2
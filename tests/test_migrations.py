@@ -0,0 +1,72 @@
+"""Миграции на отдельных SQLite-файлах: alembic запускается как в эксплуатации, командой."""
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+
+@pytest.fixture
+def migrate(tmp_path):
+    """Возвращает (путь к БД, alembic(*args) -> stdout) для новой пустой базы."""
+    path = tmp_path / "migrations.db"
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{path}"}
+
+    def alembic(*args):
+        return subprocess.run(
+            [sys.executable, "-m", "alembic", *args],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+
+    return path, alembic
+
+
+def test_0003_keeps_most_advanced_duplicate(migrate):
+    path, alembic = migrate
+    alembic("upgrade", "0002")
+    with sqlite3.connect(path) as connection:
+        connection.execute("INSERT INTO students (id, name, email) VALUES (1, 'a', 'a@example.com'), "
+                           "(2, 'b', 'b@example.com')")
+        connection.execute("INSERT INTO dance_classes (id, name) VALUES (1, 'c')")
+        connection.executemany(
+            "INSERT INTO registrations (id, student_id, dance_class_id, status) VALUES (?, ?, ?, ?)",
+            [(1, 1, 1, "cancelled"), (2, 1, 1, "confirmed"), (3, 1, 1, "pending"),
+             (4, 2, 1, "pending"), (5, 2, 1, "pending")],
+        )
+
+    alembic("upgrade", "0003")
+
+    with sqlite3.connect(path) as connection:
+        rows = connection.execute("SELECT id, status FROM registrations ORDER BY id").fetchall()
+    assert rows == [(2, "confirmed"), (4, "pending")]
+
+
+def test_0005_offline_sql_keeps_schedule_times_on_sqlite(migrate):
+    path, alembic = migrate
+    alembic("upgrade", "0004")
+    with sqlite3.connect(path) as connection:
+        connection.execute("INSERT INTO dance_classes (id, name) VALUES (1, 'c')")
+        connection.execute("INSERT INTO teachers (id, name) VALUES (1, 't')")
+        connection.executemany(
+            "INSERT INTO schedule (id, dance_class_id, teacher_id, day_of_week, start_time, end_time, room) "
+            "VALUES (?, 1, 1, ?, ?, ?, 'A')",
+            [(1, "понедельник", " 9:00", "10.30"), (2, "Вторник", "18:00:00", "24:00"),
+             (3, "ПЯТНИЦА ", "утро", "7:5")],
+        )
+
+    # alembic upgrade --sql: скрипт применяется к базе отдельно, как при ручном деплое
+    script = alembic("upgrade", "0004:0005", "--sql")
+    with sqlite3.connect(path) as connection:
+        connection.executescript(script)
+        rows = connection.execute(
+            "SELECT day_of_week, start_time, end_time FROM schedule ORDER BY id"
+        ).fetchall()
+        temp_tables = connection.execute("SELECT name FROM sqlite_temp_master").fetchall()
+
+    assert rows == [
+        ("Понедельник", "09:00", "10:30"),
+        ("Вторник", "18:00", None),
+        ("Пятница", None, None),
+    ]
+    assert temp_tables == []
@@ -0,0 +1,58 @@
+from app import models
+
+
+def _register(client, email, class_id):
+    return client.post("/registration", follow_redirects=False, data={
+        "name": "Тест",
+        "email": email,
+        "phone": "+7 900 000-00-00",
+        "level": "Начинающий",
+        "dance_class_id": class_id,
+    })
+
+
+def _registration(db, email, class_id):
+    # Завершаем транзакцию чтения: иначе сессия видит снимок БД до запроса к приложению
+    db.rollback()
+    return (db.query(models.Registration)
+            .join(models.Student, models.Student.id == models.Registration.student_id)
+            .filter(models.Student.email == email, models.Registration.dance_class_id == class_id)
+            .one())
+
+
+def test_register_again_after_cancellation_takes_a_seat(client, admin_headers, db, make_class):
+    class_id = make_class(capacity=1)
+    assert _register(client, "again@example.com", class_id).status_code == 303
+    registration = _registration(db, "again@example.com", class_id)
+    response = client.post(f"/api/admin/registrations/{registration.id}/cancel", headers=admin_headers)
+    assert response.json()["registration"]["status"] == "cancelled"
+
+    response = _register(client, "again@example.com", class_id)
+
+    assert response.status_code == 303
+    assert response.headers["location"] == "/registration/success"
+    assert _registration(db, "again@example.com", class_id).status == "pending"
+    assert db.get(models.DanceClass, class_id).seats_taken == 1
+
+
+def test_register_again_after_cancellation_joins_end_of_waitlist(client, admin_headers, db, make_class):
+    class_id = make_class(capacity=1)
+    for email in ("holder@example.com", "first@example.com", "second@example.com"):
+        _register(client, email, class_id)
+    first = _registration(db, "first@example.com", class_id)
+    client.post(f"/api/admin/registrations/{first.id}/cancel", headers=admin_headers)
+
+    response = _register(client, "first@example.com", class_id)
+
+    assert response.headers["location"] == "/registration/success?waitlist=2"
+    assert _registration(db, "first@example.com", class_id).status == "waitlisted"
+
+
+def test_repeated_registration_keeps_status(client, db, make_class):
+    class_id = make_class(capacity=0)
+    _register(client, "repeat@example.com", class_id)
+
+    response = _register(client, "repeat@example.com", class_id)
+
+    assert response.headers["location"] == "/registration/success?waitlist=1"
+    assert _registration(db, "repeat@example.com", class_id).status == "waitlisted"
@@ -0,0 +1,35 @@
+def _slot(class_id, teacher_id, room, start, end):
+    return {
+        "dance_class_id": class_id,
+        "teacher_id": teacher_id,
+        "day_of_week": "Среда",
+        "start_time": start,
+        "end_time": end,
+        "room": room,
+    }
+
+
+def test_overlapping_slot_is_rejected_with_409(client, admin_headers, make_class, make_teacher):
+    class_id, teacher_id = make_class(), make_teacher()
+    first = client.post("/api/admin/schedule", headers=admin_headers,
+                        json=_slot(class_id, teacher_id, "Тестовый зал 409", "18:00", "19:30"))
+    assert first.status_code == 200
+
+    response = client.post("/api/admin/schedule", headers=admin_headers,
+                           json=_slot(class_id, make_teacher(), "Тестовый зал 409", "19:00", "20:00"))
+
+    assert response.status_code == 409
+    conflicts = response.json()["conflicts"]
+    assert [(conflict["kind"], conflict["slot"]["id"]) for conflict in conflicts] == [("room", first.json()["id"])]
+
+
+def test_adjacent_slot_is_accepted(client, admin_headers, make_class, make_teacher):
+    class_id, teacher_id = make_class(), make_teacher()
+    slot = _slot(class_id, teacher_id, "Тестовый зал смежный", "18:00", "19:00")
+    assert client.post("/api/admin/schedule", headers=admin_headers, json=slot).status_code == 200
+
+    slot.update(start_time="19:00", end_time="20:00")
+    response = client.post("/api/admin/schedule", headers=admin_headers, json=slot)
+
+    assert response.status_code == 200
+    assert response.json()["start_time"] == "19:00"